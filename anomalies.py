@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+from schema import from_minor_units
+
+SIDES = ("Debit", "Credit")
+ROLLING_WINDOW = "90D"
+MIN_WINDOW_ROWS = 5
+# Scales a median absolute deviation to a standard deviation for normal data.
+MAD_SCALE = 1.4826
+MIN_SCALE_MINOR = 100
+DEFAULT_THRESHOLD = 3.5
+
+
+def _robust_baseline(values, dates, window, min_rows):
+    # Median and spread over a window centred on each row where it holds
+    # enough rows, otherwise the median/MAD of the whole category.
+    series = pd.Series(values, index=dates)
+    rolling = series.rolling(window, min_periods=1, center=True)
+    median = rolling.median()
+    # The spread is the rolling median of each row's distance from its own
+    # window median: an approximation of the window MAD that rolling() can
+    # compute in one pass, where the exact MAD needs a median per window.
+    mad = (series - median).abs().rolling(window, min_periods=1, center=True).median()
+    enough = rolling.count().to_numpy() >= min_rows
+    category_median = np.median(values)
+    category_mad = np.median(np.abs(values - category_median))
+    baseline = np.where(enough, median.to_numpy(), category_median)
+    spread = np.where(enough, mad.to_numpy(), category_mad)
+    return baseline, np.maximum(spread * MAD_SCALE, MIN_SCALE_MINOR)
+
+
+class AnomalyScores:
+    """Robust z-scores for every transaction, ranked once per dataset.
+
+    Each amount is compared with the median of its side and category over a
+    date window centred on it, scaled by an approximate rolling median
+    absolute deviation, so one salary or rent payment does not shift the bar
+    for everything else.
+    """
+
+    def __init__(self, df, window=ROLLING_WINDOW, min_rows=MIN_WINDOW_ROWS):
+        order = np.argsort(df["Date"].to_numpy(), kind="stable")
+        labels = df.index[order]
+        dates = df["Date"].to_numpy()[order]
+        minor = df["AmountMinor"].to_numpy(dtype="float64")[order]
+        baseline = np.zeros(len(order))
+        scale = np.ones(len(order))
+        groups = pd.DataFrame(
+            {
+                "side": df["Debit/Credit"].to_numpy()[order],
+                "category": df["Category"].to_numpy()[order],
+            }
+        ).groupby(["side", "category"], observed=True, sort=False)
+        for positions in groups.indices.values():
+            baseline[positions], scale[positions] = _robust_baseline(
+                minor[positions], dates[positions], window, min_rows
+            )
+        self.scores = pd.DataFrame(
+            {
+                "Typical": from_minor_units(baseline),
+                "Score": (minor - baseline) / scale,
+            },
+            index=labels,
+        )
+        side = df["Debit/Credit"].to_numpy()[order]
+        self.ranked = {}
+        for name in SIDES:
+            ranked = self.scores[side == name].sort_values(
+                "Score", ascending=False, kind="stable"
+            )
+            self.ranked[name] = (ranked.index, ranked["Score"].to_numpy())
+
+    def flagged(self, side, threshold):
+        labels, scores = self.ranked[side]
+        # Scores are sorted descending, so the flagged rows are a prefix.
+        return labels[: np.searchsorted(-scores, -threshold, side="right")]
+
+    def frame(self, df, side, threshold, columns):
+        labels = self.flagged(side, threshold)
+        return df.loc[labels, columns].join(self.scores.loc[labels])
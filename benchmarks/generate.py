@@ -0,0 +1,91 @@
+import argparse
+import json
+
+import numpy as np
+import pandas as pd
+
+CATEGORY_NAMES = [
+    "Food",
+    "Transport",
+    "Shopping",
+    "Utilities",
+    "Health",
+    "Entertainment",
+    "Education",
+    "Travel",
+    "Other",
+]
+SHARED_KEYWORD = "Card Payment Received"
+
+
+def generate_categories(keywords, seed=0):
+    rng = np.random.default_rng(seed)
+    categories = {"Uncategorized": []}
+    categories.update({name: [] for name in CATEGORY_NAMES})
+    owners = rng.integers(0, len(CATEGORY_NAMES), keywords)
+    for i, owner in enumerate(owners):
+        categories[CATEGORY_NAMES[owner]].append(f"MERCHANT {i:05d} AE")
+    # Mirror the real file: one keyword listed under several categories.
+    for name in CATEGORY_NAMES[:3]:
+        categories[name].append(SHARED_KEYWORD)
+    return categories
+
+
+def generate_statement(rows, categories, seed=0, unknown_share=0.2, years=3):
+    rng = np.random.default_rng(seed)
+    keywords = [kw for kws in categories.values() for kw in kws]
+    keywords = list(dict.fromkeys(keywords))
+    # Zipf-like popularity so a few merchants dominate, as in real statements.
+    weights = 1.0 / np.arange(1, len(keywords) + 1)
+    picks = rng.choice(len(keywords), rows, p=weights / weights.sum())
+    details = np.asarray(keywords, dtype=object)[picks]
+    unknown = rng.random(rows) < unknown_share
+    details[unknown] = [
+        f"UNKNOWN SHOP {i:04d}" for i in rng.integers(0, 5000, unknown.sum())
+    ]
+    credit = rng.random(rows) < 0.15
+    details[credit] = SHARED_KEYWORD
+    amounts = np.where(
+        credit,
+        rng.uniform(1_000, 25_000, rows),
+        rng.lognormal(4.5, 1.0, rows),
+    ).round(2)
+    days = pd.date_range(end="2025-03-31", periods=365 * years, freq="D")
+    day_labels = np.asarray(days.strftime("%d %b %Y"), dtype=object)
+    return pd.DataFrame(
+        {
+            "Date": day_labels[rng.integers(0, len(days), rows)],
+            "Details": details,
+            "Amount": pd.Series(amounts).map("{:,.2f}".format).to_numpy(),
+            "Currency": "AED",
+            "Debit/Credit": np.where(credit, "Credit", "Debit"),
+            "Status": np.where(rng.random(rows) < 0.02, "REVERSED", "SETTLED"),
+        }
+    )
+
+
+def write_statement(path, rows, categories, seed=0, chunk_size=1_000_000):
+    for chunk, start in enumerate(range(0, rows, chunk_size)):
+        size = min(chunk_size, rows - start)
+        generate_statement(size, categories, seed=seed + chunk).to_csv(
+            path, mode="w" if chunk == 0 else "a", header=chunk == 0, index=False
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic statement CSV.")
+    parser.add_argument("output")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--keywords", type=int, default=100)
+    parser.add_argument("--categories-output")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    categories = generate_categories(args.keywords, args.seed)
+    write_statement(args.output, args.rows, categories, args.seed)
+    if args.categories_output:
+        with open(args.categories_output, "w") as f:
+            json.dump(categories, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from benchmarks.generate import generate_categories, write_statement
+from cache import parse_cache
+from categorizer import CategoryMatcher
+from filters import FilterIndex, filter_transactions
+from ledger import Ledger
+from summary import Summary
+from utils import load_transactions, parse_transactions
+
+DEFAULT_ROWS = [1_000, 100_000]
+DEFAULT_KEYWORDS = [10, 1_000]
+DEFAULT_REPEAT = 7
+# Only cases this large are gated, and a stage only regresses when its median
+# is slower by the tolerance and by the noise floor; below that, differences
+# are timer and scheduler noise.
+MIN_GATED_ROWS = 10_000
+NOISE_FLOOR_SECONDS = 0.005
+
+
+def measure(fn, repeat):
+    times = []
+    # As timeit does: a collection triggered by earlier stages must not land
+    # inside one of the timed calls.
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+    finally:
+        gc.enable()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "seconds": min(times),
+        "median_seconds": statistics.median(times),
+        "peak_mb": peak / 2**20,
+    }
+
+
+def cold_load(path, categories):
+    parse_cache.clear()
+    return load_transactions(path, categories)
+
+
+def run_case(rows, keywords, repeat, seed=0, only=None):
+    categories = generate_categories(keywords, seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "statement.csv")
+        write_statement(path, rows, categories, seed)
+        with open(path, "rb") as f:
+            data = f.read()
+        df = parse_transactions(data)
+        df["Category"] = CategoryMatcher(categories).categorize(df["Details"])
+        date_range = (df["Date"].min(), df["Date"].max())
+        ledger = Ledger(df)
+        index = FilterIndex(df, ledger)
+        window = ledger.window(date_range)
+        stages = {
+            "parse": lambda: parse_transactions(data),
+            "categorize": lambda: CategoryMatcher(categories).categorize(df["Details"]),
+            "load_transactions": lambda: cold_load(path, categories),
+            "filter_transactions": lambda: filter_transactions(
+                df, date_range, "Shopping", "merchant 0"
+            ),
+            "filter_index_build": lambda: FilterIndex(df, ledger),
+            # A fresh query each time, not a memoized hit.
+            "filter_query": lambda: (
+                index.queries.clear(),
+                index.query(date_range, "Shopping", "merchant 0"),
+            ),
+            "ledger_build": lambda: Ledger(df),
+            "balance": lambda: ledger.frame(df, window),
+            "trend": lambda: ledger.trend(window, "M"),
+            "summary": lambda: Summary(df),
+        }
+        if only is not None:
+            stages = {name: fn for name, fn in stages.items() if name in only}
+        disk_dir, parse_cache.disk_dir = parse_cache.disk_dir, None
+        try:
+            results = {name: measure(fn, repeat) for name, fn in stages.items()}
+        finally:
+            parse_cache.disk_dir = disk_dir
+            parse_cache.clear()
+    for result in results.values():
+        result["rows_per_sec"] = rows / result["seconds"] if result["seconds"] else None
+    return {"rows": rows, "keywords": keywords, "stages": results}
+
+
+def compare(
+    results,
+    baseline,
+    tolerance,
+    noise_floor=NOISE_FLOOR_SECONDS,
+    min_rows=MIN_GATED_ROWS,
+):
+    # Baselines written before medians were recorded fall back to the minimum.
+    previous = {
+        (case["rows"], case["keywords"], stage): values.get(
+            "median_seconds", values["seconds"]
+        )
+        for case in baseline["results"]
+        for stage, values in case["stages"].items()
+    }
+    regressions = []
+    for case in results:
+        if case["rows"] < min_rows:
+            continue
+        for stage, values in case["stages"].items():
+            before = previous.get((case["rows"], case["keywords"], stage))
+            after = values["median_seconds"]
+            if (
+                before
+                and after > before * (1 + tolerance)
+                and after - before > noise_floor
+            ):
+                regressions.append(
+                    (case["rows"], case["keywords"], stage, before, after)
+                )
+    return regressions
+
+
+def confirm(results, regressions, repeat):
+    # Re-measure the suspect stages and keep each one's best median: a real
+    # slowdown is slow every time, a noisy run rarely repeats.
+    suspects = {}
+    for rows, keywords, stage, _, _ in regressions:
+        suspects.setdefault((rows, keywords), set()).add(stage)
+    for case in results:
+        stages = suspects.get((case["rows"], case["keywords"]))
+        if not stages:
+            continue
+        again = run_case(case["rows"], case["keywords"], repeat, only=stages)
+        for stage, values in again["stages"].items():
+            if values["median_seconds"] < case["stages"][stage]["median_seconds"]:
+                case["stages"][stage] = values
+
+
+def print_case(case):
+    print(f"\n{case['rows']:,} rows, {case['keywords']:,} keywords")
+    for stage, values in case["stages"].items():
+        print(
+            f"  {stage:<20} {values['seconds'] * 1000:>10.2f} ms "
+            f"(median {values['median_seconds'] * 1000:>9.2f}) "
+            f"{values['peak_mb']:>9.1f} MB {values['rows_per_sec'] or 0:>14,.0f} rows/s"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the load/filter/aggregate pipeline."
+    )
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS)
+    parser.add_argument("--keywords", type=int, nargs="+", default=DEFAULT_KEYWORDS)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--output", help="Write results as a JSON baseline.")
+    parser.add_argument("--compare", help="Baseline JSON to check against.")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument(
+        "--noise-floor-ms",
+        type=float,
+        default=NOISE_FLOOR_SECONDS * 1000,
+        help="Ignore slowdowns smaller than this many milliseconds.",
+    )
+    parser.add_argument(
+        "--min-gated-rows",
+        type=int,
+        default=MIN_GATED_ROWS,
+        help="Only check cases with at least this many rows.",
+    )
+    parser.add_argument(
+        "--confirm",
+        type=int,
+        default=2,
+        help="Re-measure suspected regressions up to this many times.",
+    )
+    args = parser.parse_args()
+
+    results = []
+    for rows in args.rows:
+        for keywords in args.keywords:
+            case = run_case(rows, keywords, args.repeat)
+            print_case(case)
+            results.append(case)
+
+    if args.output:
+        report = {
+            "meta": {
+                "python": platform.python_version(),
+                "pandas": pd.__version__,
+                "platform": platform.platform(),
+                "repeat": args.repeat,
+            },
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        gate = (args.tolerance, args.noise_floor_ms / 1000, args.min_gated_rows)
+        regressions = compare(results, baseline, *gate)
+        for _ in range(args.confirm):
+            if not regressions:
+                break
+            confirm(results, regressions, args.repeat)
+            regressions = compare(results, baseline, *gate)
+        for rows, keywords, stage, before, after in regressions:
+            print(
+                f"REGRESSION {stage} ({rows:,} rows, {keywords:,} keywords): "
+                f"{before * 1000:.2f} ms -> {after * 1000:.2f} ms"
+            )
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+from instrumentation import record_cache
+
+try:
+    import pyarrow  # noqa: F401
+except ImportError:
+    pyarrow = None
+
+# Bump whenever parsing changes so stale on-disk entries are ignored.
+PARSER_VERSION = "3"
+DISK_FORMATS = ("parquet", "feather")
+# The on-disk tier holds whole statements, so it is off unless a directory
+# is configured.
+DISK_DIR = os.environ.get("SIMPLEFINANCE_PARSE_CACHE_DIR") or None
+MAX_DISK_BYTES = 512 * 1024 * 1024
+
+
+# Session entries built from the working frame. The ledger is not listed:
+# edits patch it in place.
+DERIVED_KEYS = (
+    "filter_index",
+    "summary",
+    "sort_orders",
+    "exports",
+    "recurring",
+    "anomalies",
+)
+
+
+def cached_for(df, store, key, factory, *inputs):
+    # Reused while the frame and any other inputs are the same objects.
+    cached = store.get(key)
+    hit = (
+        cached is not None
+        and cached[0] is df
+        and all(old is new for old, new in zip(cached[1], inputs))
+    )
+    record_cache(key, hit)
+    if hit:
+        return cached[2]
+    value = factory(df, *inputs)
+    store[key] = (df, inputs, value)
+    return value
+
+
+def invalidate_derived(state, keys=DERIVED_KEYS):
+    # After an in-place edit: drop what was built from the old values and
+    # bump the counter scheduler.data_version keys background jobs on.
+    for key in keys:
+        state.pop(key, None)
+    state["edit_version"] = state.get("edit_version", 0) + 1
+
+
+def content_key(data):
+    digest = hashlib.blake2b(data, digest_size=20)
+    digest.update(PARSER_VERSION.encode("ascii"))
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """LRU cache of parsed statements keyed by a hash of the uploaded bytes.
+
+    Parsed frames and categorized frames are kept apart so a change to the
+    category rules only re-runs categorization, not CSV parsing.
+    """
+
+    def __init__(
+        self,
+        max_entries=8,
+        disk_dir=None,
+        disk_format="parquet",
+        max_disk_bytes=MAX_DISK_BYTES,
+    ):
+        if disk_format not in DISK_FORMATS:
+            raise ValueError(f"Unknown disk format: {disk_format}")
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir if pyarrow is not None else None
+        self.disk_format = disk_format
+        self.max_disk_bytes = max_disk_bytes
+        self.entries = OrderedDict()
+        # Shared by every session's script thread.
+        self.lock = threading.Lock()
+
+    def _entry(self, key):
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        return entry
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.{self.disk_format}")
+
+    def _read_disk(self, key):
+        if self.disk_dir is None:
+            return None
+        path = self._disk_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            if self.disk_format == "parquet":
+                df = pd.read_parquet(path)
+            else:
+                df = pd.read_feather(path)
+        except Exception:
+            return None
+        # The modification time doubles as the last-use time for eviction.
+        os.utime(path)
+        return df
+
+    def _write_disk(self, key, df):
+        if self.disk_dir is None:
+            return
+        os.makedirs(self.disk_dir, exist_ok=True)
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            if self.disk_format == "parquet":
+                df.to_parquet(tmp_path, index=False)
+            else:
+                df.reset_index(drop=True).to_feather(tmp_path)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self._evict_disk()
+
+    def _evict_disk(self):
+        suffix = f".{self.disk_format}"
+        files = []
+        for entry in os.scandir(self.disk_dir):
+            if entry.name.endswith(suffix):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def get_parsed(self, key):
+        with self.lock:
+            entry = self._entry(key)
+            if entry is not None:
+                return entry["parsed"]
+        df = self._read_disk(key)
+        if df is None:
+            return None
+        with self.lock:
+            self._store(key, df)
+        return df
+
+    def put_parsed(self, key, df):
+        with self.lock:
+            self._store(key, df)
+        self._write_disk(key, df)
+
+    def _store(self, key, df):
+        self.entries[key] = {"parsed": df, "rules_key": None, "categorized": None}
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def get_categorized(self, key, rules_key):
+        with self.lock:
+            entry = self._entry(key)
+            if entry is None or entry["rules_key"] != rules_key:
+                return None
+            return entry["categorized"]
+
+    def put_categorized(self, key, rules_key, df):
+        with self.lock:
+            entry = self._entry(key)
+            if entry is None:
+                return
+            entry["rules_key"] = rules_key
+            entry["categorized"] = df
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+parse_cache = ParseCache(disk_dir=DISK_DIR)
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import threading
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+UNCATEGORIZED = "Uncategorized"
+MATCH_MODES = ("exact", "substring", "prefix")
+
+
+def normalize_text(text):
+    return str(text).lower().strip()
+
+
+def rules_fingerprint(categories):
+    # Category order is significant (last category wins), so keys are not sorted.
+    payload = json.dumps(categories, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _is_boundary(text, pos):
+    return pos < 0 or pos >= len(text) or not text[pos].isalnum()
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton over normalized keywords."""
+
+    def __init__(self, keywords):
+        self.keywords = list(keywords)
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for keyword_id, keyword in enumerate(self.keywords):
+            state = 0
+            for char in keyword:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][char] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                state = next_state
+            self.output[state].append(keyword_id)
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                if self.fail[next_state] == next_state:
+                    self.fail[next_state] = 0
+                self.output[next_state] = (
+                    self.output[next_state] + self.output[self.fail[next_state]]
+                )
+
+    def iter_matches(self, text):
+        state = 0
+        for end, char in enumerate(text):
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            for keyword_id in self.output[state]:
+                keyword = self.keywords[keyword_id]
+                yield end - len(keyword) + 1, end + 1, keyword
+
+
+class CategoryMatcher:
+    """Compiled keyword -> category rules built once from categories.json."""
+
+    def __init__(self, categories, match="exact"):
+        if match not in MATCH_MODES:
+            raise ValueError(f"Unknown match mode: {match}")
+        self.match = match
+        self.fingerprint = rules_fingerprint(categories)
+        self.category_names = list(dict.fromkeys([UNCATEGORIZED, *categories]))
+        self.lookup = {}
+        self.rank = {}
+        for rank, (category, keywords) in enumerate(categories.items()):
+            if category == UNCATEGORIZED or not keywords:
+                continue
+            self.rank[category] = rank
+            for keyword in keywords:
+                keyword = normalize_text(keyword)
+                if keyword:
+                    # Later categories overwrite earlier ones for duplicate keywords.
+                    self.lookup[keyword] = category
+        self._automaton = None
+
+    @property
+    def automaton(self):
+        if self._automaton is None:
+            self._automaton = KeywordAutomaton(self.lookup)
+        return self._automaton
+
+    def match_one(self, details):
+        details = normalize_text(details)
+        category = self.lookup.get(details)
+        if category is not None or self.match == "exact":
+            return category
+        best = None
+        for start, end, keyword in self.automaton.iter_matches(details):
+            if self.match == "prefix" and start != 0:
+                continue
+            # Keywords must sit on word boundaries so "DU" does not match "DUBAI".
+            if not (_is_boundary(details, start - 1) and _is_boundary(details, end)):
+                continue
+            candidate = self.lookup[keyword]
+            if best is None or self.rank[candidate] >= self.rank[best]:
+                best = candidate
+        return best
+
+    def categorize(self, details):
+        dtype = pd.CategoricalDtype(self.category_names)
+        codes, uniques = pd.factorize(details)
+        if len(uniques) == 0:
+            return pd.Series(UNCATEGORIZED, index=details.index, dtype=dtype)
+        normalized = pd.Index(uniques).astype(str).str.lower().str.strip()
+        labels = np.asarray(normalized.map(self.lookup), dtype=object)
+        if self.match != "exact":
+            for pos in np.flatnonzero(pd.isna(labels)):
+                labels[pos] = self.match_one(normalized[pos])
+        labels[pd.isna(labels)] = UNCATEGORIZED
+        # Missing details get code -1, which indexes this trailing sentinel.
+        labels = np.append(labels, UNCATEGORIZED)
+        return pd.Series(labels[codes], index=details.index, dtype=dtype)
+
+
+_compiled = {}
+_compiled_lock = threading.Lock()
+_MAX_COMPILED = 8
+
+
+def compile_categories(categories, match="exact"):
+    key = (rules_fingerprint(categories), match)
+    with _compiled_lock:
+        matcher = _compiled.get(key)
+    if matcher is None:
+        matcher = CategoryMatcher(categories, match)
+        with _compiled_lock:
+            matcher = _compiled.setdefault(key, matcher)
+            while len(_compiled) > _MAX_COMPILED:
+                _compiled.pop(next(iter(_compiled)))
+    return matcher
@@ -4,48 +4,144 @@ st.set_page_config(page_title="Simple Finance App", page_icon="💰", layout="wi
 
 import plotly.express as px
 from utils import (
-    load_categories,
-    save_categories,
-    load_transactions,
-    add_keyword_to_category,
+    add_category,
+    sync_categories,
+    load_statements,
+    add_keywords_to_categories,
+    apply_edits,
+    record_edits,
+    changed_rows,
+)
+from functools import partial
+from categorizer import MATCH_MODES
+from cache import cached_for, invalidate_derived
+from filters import FilterIndex, filtered_view
+from ledger import Ledger
+from export import ExportCache, available_formats, export_button
+from summary import Summary
+from recurring import RecurringIndex
+from anomalies import DEFAULT_THRESHOLD, AnomalyScores
+from tables import SortOrders, lazy_section, paginated_table
+from ingest import (
+    STREAMING_THRESHOLD_BYTES,
+    load_streamed_statement,
+    selected_window,
+    streaming_available,
+)
+from store import open_store
+from scheduler import data_version, session_scheduler
+from instrumentation import (
+    finish_rerun,
+    metrics_panel,
+    stage,
+    start_rerun,
+    track_frame,
 )
-from filters import filter_transactions, add_balance_columns
 import pandas as pd
 
+RECURRING_COLUMNS = ["Details", "Frequency", "Amount", "AmountCV", "Last", "Next"]
+RECURRING_COLUMN_CONFIG = {
+    "Amount": st.column_config.NumberColumn("Typical Amount", format="%.2f AED"),
+    "AmountCV": st.column_config.NumberColumn("Amount Variation", format="percent"),
+    "Last": st.column_config.DateColumn("Last Charge", format="DD/MM/YYYY"),
+    "Next": st.column_config.DateColumn("Next Charge", format="DD/MM/YYYY"),
+}
 
-def dashboard():
+ANOMALY_COLUMN_CONFIG = {
+    "Amount": st.column_config.NumberColumn("Amount", format="%.2f AED"),
+    "Typical": st.column_config.NumberColumn("Typical Amount", format="%.2f AED"),
+    "Score": st.column_config.NumberColumn("Score", format="%.1f"),
+}
+ANOMALY_HELP = (
+    "How many robust deviations a transaction must sit above the typical "
+    "amount for its category over the 90 days centred on it."
+)
+
+
+def render_dashboard():
     st.markdown(
         "<h1 style='text-align: center; color: #4F8BF9;'>💰 SimpleFinance: Personal Finance Dashboard</h1>",
         unsafe_allow_html=True,
     )
 
-    if "categories" not in st.session_state:
-        st.session_state.categories = load_categories()
-    else:
-        st.session_state.categories = load_categories()
+    sync_categories(st.session_state)
 
-    uploaded_file = st.file_uploader(
-        "Upload your transaction CSV file",
+    uploaded_files = st.file_uploader(
+        "Upload your transaction CSV files",
         type=["csv"],
-        help="Upload your bank statement in CSV format.",
+        accept_multiple_files=True,
+        help="Upload one or more bank or card statements in CSV format. "
+        "Each file is tagged as its own account.",
     )
 
-    if uploaded_file is not None:
-        df = load_transactions(uploaded_file, st.session_state.categories)
+    match_mode = st.sidebar.selectbox(
+        "Keyword Matching",
+        MATCH_MODES,
+        help="exact: the whole Details text must equal a keyword. "
+        "substring: a keyword may appear as whole words anywhere in "
+        "Details. prefix: Details must start with a keyword.",
+    )
+
+    use_store = st.sidebar.checkbox(
+        "Keep transaction history",
+        help="Import uploads into the local transaction store and browse "
+        "everything imported so far.",
+    )
+
+    if uploaded_files or use_store:
+        statement = None
+        with stage("load"):
+            if use_store:
+                statement = open_store(
+                    uploaded_files, st.session_state.categories, match_mode
+                )
+                df = None
+            elif (
+                len(uploaded_files) == 1
+                and uploaded_files[0].size > STREAMING_THRESHOLD_BYTES
+                and streaming_available()
+            ):
+                statement = load_streamed_statement(
+                    uploaded_files[0], st.session_state.categories, match_mode
+                )
+                df = None
+            else:
+                df = load_statements(
+                    uploaded_files, st.session_state.categories, match_mode
+                )
+            if statement is not None:
+                df = statement.read(selected_window(statement))
         if df is not None:
+            track_frame("transactions", df)
+            account_columns = (
+                ["Account"]
+                if "Account" in df and df["Account"].cat.categories.size > 1
+                else []
+            )
             debits_df = df[df["Debit/Credit"] == "Debit"].copy()
             credits_df = df[df["Debit/Credit"] == "Credit"].copy()
             st.session_state.debits_df = debits_df.copy()
             st.session_state.credits_df = credits_df.copy()
 
             st.sidebar.header("🔎 Filters & Search")
-            min_date = df["Date"].min()
-            max_date = df["Date"].max()
+            if statement is not None:
+                min_date = statement.min_date
+                max_date = statement.max_date
+                default_range = statement.default_window()
+                st.sidebar.caption(
+                    f"{statement.label}: {len(df):,} of {statement.row_count:,} "
+                    "rows loaded for the selected date range."
+                )
+            else:
+                min_date = df["Date"].min()
+                max_date = df["Date"].max()
+                default_range = [min_date, max_date]
             date_range = st.sidebar.date_input(
                 "Select Date Range",
-                [min_date, max_date],
+                default_range,
                 min_value=min_date,
                 max_value=max_date,
+                key="date_range",
             )
             category_options = ["All"] + list(st.session_state.categories.keys())
             selected_category = st.sidebar.selectbox(
@@ -53,33 +149,63 @@ def dashboard():
             )
             search_text = st.sidebar.text_input("Search Details")
 
-            filtered_df = filter_transactions(
-                df, date_range, selected_category, search_text
-            )
-            filtered_df = add_balance_columns(filtered_df)
+            with stage("ledger", rows=len(df)):
+                if use_store:
+                    ledger = statement.ledger(df)
+                else:
+                    ledger = cached_for(df, st.session_state, "ledger", Ledger)
+            with stage("filter_index", rows=len(df)):
+                filter_index = cached_for(
+                    df, st.session_state, "filter_index", FilterIndex, ledger
+                )
+            sort_orders = cached_for(df, st.session_state, "sort_orders", SortOrders)
+
+            def recurring_source():
+                if use_store:
+                    return statement.recurring()
+                return cached_for(df, st.session_state, "recurring", RecurringIndex)
 
             st.markdown("### 📈 Trends & Balance Overview")
             trend_period = st.radio(
                 "Trend Period", ["Monthly", "Yearly"], horizontal=True
             )
-            if trend_period == "Monthly":
-                filtered_df["Period"] = (
-                    filtered_df["Date"].dt.to_period("M").astype(str)
-                )
-            else:
-                filtered_df["Period"] = filtered_df["Date"].dt.year.astype(str)
-            trend_df = (
-                filtered_df.groupby(["Period", "Debit/Credit"])["Amount"]
-                .sum()
-                .reset_index()
-                .pivot(index="Period", columns="Debit/Credit", values="Amount")
-                .fillna(0)
+            # Filtering, balances and the trend run in the background; until the
+            # new view is ready the previous one is shown, marked as stale.
+            scheduler = session_scheduler(st.session_state)
+            view_inputs = (
+                data_version(df, st.session_state),
+                tuple(map(str, date_range)),
+                selected_category,
+                search_text,
+                trend_period,
+            )
+            view_key, (filtered_df, trend_df), stale = scheduler.result(
+                "view",
+                view_inputs,
+                partial(
+                    filtered_view,
+                    df,
+                    ledger,
+                    filter_index,
+                    date_range,
+                    selected_category,
+                    search_text,
+                    "M" if trend_period == "Monthly" else "Y",
+                ),
             )
-            trend_df["Net"] = trend_df.get("Credit", 0) - trend_df.get("Debit", 0)
-            st.line_chart(trend_df[["Debit", "Credit", "Net"]])
+            _, view_dates, view_category, view_search, _ = view_key
+            if stale:
+                st.caption(
+                    "⏳ Showing the previous results while the new filters are "
+                    "applied."
+                )
+            track_frame("filtered", filtered_df)
+            with stage("charts"):
+                st.line_chart(trend_df[["Debit", "Credit", "Net"]])
 
             st.markdown("### 💹 Running Balance")
-            st.area_chart(filtered_df.set_index("Date")["Balance"])
+            with stage("charts"):
+                st.area_chart(filtered_df.set_index("Date")["Balance"])
 
             st.markdown("### 🏆 Top Transactions")
             top_n = st.slider("Show Top N", min_value=3, max_value=20, value=5)
@@ -92,7 +218,9 @@ def dashboard():
                     .head(top_n)
                 )
                 st.dataframe(
-                    top_exp[["Date", "Details", "Amount", "Category"]],
+                    top_exp[
+                        ["Date", "Details", "Amount", "Category"] + account_columns
+                    ],
                     use_container_width=True,
                     hide_index=True,
                 )
@@ -104,7 +232,9 @@ def dashboard():
                     .head(top_n)
                 )
                 st.dataframe(
-                    top_pay[["Date", "Details", "Amount", "Category"]],
+                    top_pay[
+                        ["Date", "Details", "Amount", "Category"] + account_columns
+                    ],
                     use_container_width=True,
                     hide_index=True,
                 )
@@ -115,41 +245,46 @@ def dashboard():
             )
             if drill_category != "All":
                 drill_df = filtered_df[filtered_df["Category"] == drill_category]
-                st.dataframe(
-                    drill_df[["Date", "Details", "Amount", "Debit/Credit"]],
-                    use_container_width=True,
-                    hide_index=True,
+                paginated_table(
+                    drill_df,
+                    ["Date", "Details", "Amount", "Debit/Credit"] + account_columns,
+                    key="drilldown",
+                    sort_orders=sort_orders,
                 )
             else:
-                st.dataframe(
-                    filtered_df[
-                        ["Date", "Details", "Amount", "Category", "Debit/Credit"]
-                    ],
-                    use_container_width=True,
-                    hide_index=True,
+                paginated_table(
+                    filtered_df,
+                    ["Date", "Details", "Amount", "Category", "Debit/Credit"]
+                    + account_columns,
+                    key="drilldown",
+                    sort_orders=sort_orders,
                 )
 
             st.markdown("### ⬇️ Export Filtered Data")
-            st.download_button(
-                label="Download Filtered Data as CSV",
-                data=filtered_df.to_csv(index=False).encode("utf-8"),
-                file_name="filtered_transactions.csv",
-                mime="text/csv",
+            exports = cached_for(
+                df, st.session_state, "exports", lambda df: ExportCache()
+            )
+            export_format = st.radio(
+                "Export Format", available_formats(), horizontal=True
+            )
+            export_button(
+                f"Download Filtered Data as {export_format}",
+                filtered_df,
+                "filtered_transactions",
+                export_format,
+                exports,
+                (view_dates, view_category, view_search),
             )
 
-            if search_text:
-                st.markdown(f"**Highlighted Results for:** `{search_text}`")
-                highlight_df = filtered_df[
-                    filtered_df["Details"].str.contains(
-                        search_text, case=False, na=False
-                    )
-                ]
-                st.dataframe(
-                    highlight_df[
-                        ["Date", "Details", "Amount", "Category", "Debit/Credit"]
-                    ],
-                    use_container_width=True,
-                    hide_index=True,
+            if view_search:
+                st.markdown(f"**Highlighted Results for:** `{view_search}`")
+                # The search is already applied to filtered_df by the filter index.
+                paginated_table(
+                    filtered_df,
+                    ["Date", "Details", "Amount", "Category", "Debit/Credit"]
+                    + account_columns,
+                    key="highlight",
+                    sort_orders=sort_orders,
                 )
 
             tab1, tab2 = st.tabs(["Expenses (Debits)", "Payments (Credits)"])
@@ -157,56 +292,58 @@ def dashboard():
                 new_category = st.text_input("New Category Name")
                 add_button = st.button("Add Category")
                 if add_button and new_category:
-                    if new_category not in st.session_state.categories:
-                        st.session_state.categories[new_category] = []
-                        save_categories(st.session_state.categories)
+                    if add_category(st.session_state.categories, new_category):
                         st.rerun()
                 st.subheader("Your Expenses")
-                edited_df = st.data_editor(
-                    st.session_state.debits_df[
-                        ["Date", "Details", "Amount", "Category"]
-                    ],
+                edited_df = paginated_table(
+                    st.session_state.debits_df,
+                    ["Date", "Details", "Amount", "Category"],
+                    key="category_editor",
+                    sort_orders=sort_orders,
+                    editable=True,
                     column_config={
                         "Date": st.column_config.DateColumn(
                             "Date", format="DD/MM/YYYY"
                         ),
                         "Amount": st.column_config.NumberColumn(
-                            "Amount", format="%.2f AED"
+                            "Amount", format="%.2f AED", required=True
                         ),
                         "Category": st.column_config.SelectboxColumn(
                             "Category", options=list(st.session_state.categories.keys())
                         ),
                     },
-                    hide_index=True,
-                    use_container_width=True,
-                    key="category_editor",
                 )
                 save_button = st.button("Apply Changes", type="primary")
                 if save_button:
-                    for idx, row in edited_df.iterrows():
-                        st.session_state.debits_df.at[idx, "Amount"] = row["Amount"]
-                        st.session_state.debits_df.at[idx, "Category"] = row["Category"]
-                        details = row["Details"]
-                        add_keyword_to_category(
-                            st.session_state.categories, row["Category"], details
-                        )
-                    df.update(st.session_state.debits_df)
-                total_expenses = st.session_state.debits_df["Amount"].sum()
-                total_income = st.session_state.credits_df["Amount"].sum()
-                net_savings = total_income - total_expenses
-                num_transactions = len(df)
+                    changed = changed_rows(
+                        st.session_state.debits_df,
+                        edited_df,
+                    )
+                    if not changed.empty:
+                        apply_edits(st.session_state.debits_df, changed)
+                        apply_edits(df, changed)
+                        record_edits(df, changed, st.session_state)
+                        if statement is not None:
+                            statement.update_rows(
+                                st.session_state.debits_df.loc[changed.index]
+                            )
+                        invalidate_derived(st.session_state)
+                        if not add_keywords_to_categories(
+                            st.session_state.categories,
+                            zip(changed["Category"], changed["Details"]),
+                        ):
+                            # New keywords re-categorize into a fresh frame and
+                            # ledger on the next rerun; otherwise patch this one.
+                            ledger.update(st.session_state.debits_df.loc[changed.index])
+                with stage("summary", rows=len(df)):
+                    summary = cached_for(df, st.session_state, "summary", Summary)
                 col1, col2, col3, col4 = st.columns(4)
-                col1.metric("Total Expenses", f"{total_expenses:,.2f} AED")
-                col2.metric("Total Income", f"{total_income:,.2f} AED")
-                col3.metric("Net Savings", f"{net_savings:,.2f} AED")
-                col4.metric("Transactions", num_transactions)
+                col1.metric("Total Expenses", f"{summary.total('Debit'):,.2f} AED")
+                col2.metric("Total Income", f"{summary.total('Credit'):,.2f} AED")
+                col3.metric("Net Savings", f"{summary.net_savings:,.2f} AED")
+                col4.metric("Transactions", summary.rows)
                 st.subheader("Expense Summary")
-                category_totals = (
-                    st.session_state.debits_df.groupby("Category")["Amount"]
-                    .sum()
-                    .reset_index()
-                )
-                category_totals = category_totals.sort_values("Amount", ascending=False)
+                category_totals = summary.category_totals("Debit")
                 st.dataframe(
                     category_totals,
                     column_config={
@@ -218,112 +355,123 @@ def dashboard():
                     hide_index=True,
                 )
                 chart_type = st.radio("Chart Type", ["Pie", "Bar"], horizontal=True)
-                if chart_type == "Pie":
-                    fig = px.pie(
-                        category_totals,
-                        values="Amount",
-                        names="Category",
-                        title="Expenses by Category",
-                    )
-                else:
-                    fig = px.bar(
-                        category_totals,
-                        x="Category",
-                        y="Amount",
-                        title="Expenses by Category",
-                        text_auto=".2s",
-                    )
-                st.plotly_chart(fig, use_container_width=True)
+                with stage("charts"):
+                    if chart_type == "Pie":
+                        fig = px.pie(
+                            category_totals,
+                            values="Amount",
+                            names="Category",
+                            title="Expenses by Category",
+                        )
+                    else:
+                        fig = px.bar(
+                            category_totals,
+                            x="Category",
+                            y="Amount",
+                            title="Expenses by Category",
+                            text_auto=".2s",
+                        )
+                    st.plotly_chart(fig, use_container_width=True)
                 st.subheader("Recurring Expenses")
-                recurring = st.session_state.debits_df["Details"].value_counts()
-                recurring = recurring[recurring > 1]
-                if not recurring.empty:
-                    st.dataframe(
-                        st.session_state.debits_df[
-                            st.session_state.debits_df["Details"].isin(recurring.index)
-                        ][["Date", "Details", "Amount", "Category"]],
-                        use_container_width=True,
-                        hide_index=True,
-                    )
-                else:
-                    st.write("No recurring expenses detected.")
+                if lazy_section(
+                    "Show recurring expenses", key="show_recurring_expenses"
+                ):
+                    recurring = recurring_source().subscriptions("Debit")
+                    if not recurring.empty:
+                        paginated_table(
+                            recurring,
+                            RECURRING_COLUMNS,
+                            key="recurring_expenses",
+                            column_config=RECURRING_COLUMN_CONFIG,
+                        )
+                    else:
+                        st.write("No recurring expenses detected.")
                 st.subheader("Anomalies (Large Expenses)")
+                anomaly_scores = cached_for(
+                    df, st.session_state, "anomalies", AnomalyScores
+                )
                 threshold = st.number_input(
-                    "Anomaly Threshold (AED)",
+                    "Anomaly Score Threshold",
                     min_value=0.0,
-                    value=float(
-                        st.session_state.debits_df["Amount"].mean()
-                        + 2 * st.session_state.debits_df["Amount"].std()
-                    ),
+                    value=DEFAULT_THRESHOLD,
+                    step=0.5,
+                    help=ANOMALY_HELP,
+                )
+                anomalies = anomaly_scores.frame(
+                    st.session_state.debits_df,
+                    "Debit",
+                    threshold,
+                    ["Date", "Details", "Amount", "Category"],
                 )
-                anomalies = st.session_state.debits_df[
-                    st.session_state.debits_df["Amount"] > threshold
-                ]
                 if not anomalies.empty:
                     st.dataframe(
-                        anomalies[["Date", "Details", "Amount", "Category"]],
+                        anomalies,
+                        column_config=ANOMALY_COLUMN_CONFIG,
                         use_container_width=True,
                         hide_index=True,
                     )
                 else:
                     st.write("No anomalies detected.")
-                st.download_button(
-                    label="Download Expenses as CSV",
-                    data=st.session_state.debits_df.to_csv(index=False).encode("utf-8"),
-                    file_name="expenses.csv",
-                    mime="text/csv",
+                export_button(
+                    f"Download Expenses as {export_format}",
+                    st.session_state.debits_df,
+                    "expenses",
+                    export_format,
+                    exports,
+                    "expenses",
                 )
             with tab2:
                 st.subheader("Your Payments")
-                edited_credits_df = st.data_editor(
-                    st.session_state.credits_df[
-                        ["Date", "Details", "Amount", "Category"]
-                    ],
+                edited_credits_df = paginated_table(
+                    st.session_state.credits_df,
+                    ["Date", "Details", "Amount", "Category"],
+                    key="credit_category_editor",
+                    sort_orders=sort_orders,
+                    editable=True,
                     column_config={
                         "Date": st.column_config.DateColumn(
                             "Date", format="DD/MM/YYYY"
                         ),
                         "Amount": st.column_config.NumberColumn(
-                            "Amount", format="%.2f AED"
+                            "Amount", format="%.2f AED", required=True
                         ),
                         "Category": st.column_config.SelectboxColumn(
                             "Category", options=list(st.session_state.categories.keys())
                         ),
                     },
-                    hide_index=True,
-                    use_container_width=True,
-                    key="credit_category_editor",
                 )
                 save_credits_button = st.button("Apply Credit Changes", type="primary")
                 if save_credits_button:
-                    for idx, row in edited_credits_df.iterrows():
-                        st.session_state.credits_df.at[idx, "Amount"] = row["Amount"]
-                        st.session_state.credits_df.at[idx, "Category"] = row[
-                            "Category"
-                        ]
-                        details = row["Details"]
-                        add_keyword_to_category(
-                            st.session_state.categories, row["Category"], details
-                        )
-                    df.update(st.session_state.credits_df)
-                total_expenses = st.session_state.debits_df["Amount"].sum()
-                total_income = st.session_state.credits_df["Amount"].sum()
-                net_savings = total_income - total_expenses
-                num_transactions = len(df)
+                    changed = changed_rows(
+                        st.session_state.credits_df,
+                        edited_credits_df,
+                    )
+                    if not changed.empty:
+                        apply_edits(st.session_state.credits_df, changed)
+                        apply_edits(df, changed)
+                        record_edits(df, changed, st.session_state)
+                        if statement is not None:
+                            statement.update_rows(
+                                st.session_state.credits_df.loc[changed.index]
+                            )
+                        invalidate_derived(st.session_state)
+                        if not add_keywords_to_categories(
+                            st.session_state.categories,
+                            zip(changed["Category"], changed["Details"]),
+                        ):
+                            # New keywords re-categorize into a fresh frame and
+                            # ledger on the next rerun; otherwise patch this one.
+                            ledger.update(
+                                st.session_state.credits_df.loc[changed.index]
+                            )
+                summary = cached_for(df, st.session_state, "summary", Summary)
                 col1, col2, col3, col4 = st.columns(4)
-                col1.metric("Total Expenses", f"{total_expenses:,.2f} AED")
-                col2.metric("Total Income", f"{total_income:,.2f} AED")
-                col3.metric("Net Savings", f"{net_savings:,.2f} AED")
-                col4.metric("Transactions", num_transactions)
+                col1.metric("Total Expenses", f"{summary.total('Debit'):,.2f} AED")
+                col2.metric("Total Income", f"{summary.total('Credit'):,.2f} AED")
+                col3.metric("Net Savings", f"{summary.net_savings:,.2f} AED")
+                col4.metric("Transactions", summary.rows)
                 st.subheader("Payments Summary")
-                credit_category_totals = (
-                    st.session_state.credits_df.groupby("Category")["Amount"]
-                    .sum()
-                    .reset_index()
-                )
-                credit_category_totals = credit_category_totals.sort_values(
-                    "Amount", ascending=False
-                )
+                credit_category_totals = summary.category_totals("Credit")
                 st.dataframe(
                     credit_category_totals,
                     column_config={
@@ -340,65 +488,80 @@ def dashboard():
                     horizontal=True,
                     key="credit_chart_type",
                 )
-                if chart_type2 == "Pie":
-                    fig2 = px.pie(
-                        credit_category_totals,
-                        values="Amount",
-                        names="Category",
-                        title="Payments by Category",
-                    )
-                else:
-                    fig2 = px.bar(
-                        credit_category_totals,
-                        x="Category",
-                        y="Amount",
-                        title="Payments by Category",
-                        text_auto=".2s",
-                    )
-                st.plotly_chart(fig2, use_container_width=True)
+                with stage("charts"):
+                    if chart_type2 == "Pie":
+                        fig2 = px.pie(
+                            credit_category_totals,
+                            values="Amount",
+                            names="Category",
+                            title="Payments by Category",
+                        )
+                    else:
+                        fig2 = px.bar(
+                            credit_category_totals,
+                            x="Category",
+                            y="Amount",
+                            title="Payments by Category",
+                            text_auto=".2s",
+                        )
+                    st.plotly_chart(fig2, use_container_width=True)
                 st.subheader("Recurring Payments")
-                recurring_credits = st.session_state.credits_df[
-                    "Details"
-                ].value_counts()
-                recurring_credits = recurring_credits[recurring_credits > 1]
-                if not recurring_credits.empty:
-                    st.dataframe(
-                        st.session_state.credits_df[
-                            st.session_state.credits_df["Details"].isin(
-                                recurring_credits.index
-                            )
-                        ][["Date", "Details", "Amount", "Category"]],
-                        use_container_width=True,
-                        hide_index=True,
-                    )
-                else:
-                    st.write("No recurring payments detected.")
+                if lazy_section(
+                    "Show recurring payments", key="show_recurring_payments"
+                ):
+                    recurring_credits = recurring_source().subscriptions("Credit")
+                    if not recurring_credits.empty:
+                        paginated_table(
+                            recurring_credits,
+                            RECURRING_COLUMNS,
+                            key="recurring_payments",
+                            column_config=RECURRING_COLUMN_CONFIG,
+                        )
+                    else:
+                        st.write("No recurring payments detected.")
                 st.subheader("Anomalies (Large Payments)")
+                anomaly_scores = cached_for(
+                    df, st.session_state, "anomalies", AnomalyScores
+                )
                 threshold_credits = st.number_input(
-                    "Anomaly Threshold (AED)",
+                    "Anomaly Score Threshold",
                     min_value=0.0,
-                    value=float(
-                        st.session_state.credits_df["Amount"].mean()
-                        + 2 * st.session_state.credits_df["Amount"].std()
-                    ),
+                    value=DEFAULT_THRESHOLD,
+                    step=0.5,
+                    help=ANOMALY_HELP,
                     key="credit_anomaly",
                 )
-                anomalies_credits = st.session_state.credits_df[
-                    st.session_state.credits_df["Amount"] > threshold_credits
-                ]
+                anomalies_credits = anomaly_scores.frame(
+                    st.session_state.credits_df,
+                    "Credit",
+                    threshold_credits,
+                    ["Date", "Details", "Amount", "Category"],
+                )
                 if not anomalies_credits.empty:
                     st.dataframe(
-                        anomalies_credits[["Date", "Details", "Amount", "Category"]],
+                        anomalies_credits,
+                        column_config=ANOMALY_COLUMN_CONFIG,
                         use_container_width=True,
                         hide_index=True,
                     )
                 else:
                     st.write("No anomalies detected.")
-                st.download_button(
-                    label="Download Payments as CSV",
-                    data=st.session_state.credits_df.to_csv(index=False).encode(
-                        "utf-8"
-                    ),
-                    file_name="payments.csv",
-                    mime="text/csv",
+                export_button(
+                    f"Download Payments as {export_format}",
+                    st.session_state.credits_df,
+                    "payments",
+                    export_format,
+                    exports,
+                    "payments",
                 )
+            if stale:
+                scheduler.rerun_when_ready("view", view_inputs)
+
+
+def dashboard():
+    metrics = start_rerun(st.session_state)
+    try:
+        render_dashboard()
+    finally:
+        finish_rerun(st.session_state, metrics)
+    metrics_panel(st.session_state)
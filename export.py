@@ -0,0 +1,90 @@
+import gzip
+import io
+import threading
+from collections import OrderedDict
+
+import streamlit as st
+from schema import export_frame
+from streamlit.errors import StreamlitAPIException
+
+try:
+    import pyarrow  # noqa: F401
+except ImportError:
+    pyarrow = None
+
+DEFAULT_CHUNK_SIZE = 50_000
+FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "CSV (gzip)": ("csv.gz", "application/gzip"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+
+def available_formats():
+    return [name for name in FORMATS if name != "Parquet" or pyarrow is not None]
+
+
+def write_csv(df, sink, chunk_size=DEFAULT_CHUNK_SIZE):
+    # Encode chunk by chunk straight into the sink instead of building one
+    # string for the whole frame and then a bytes copy of it.
+    text = io.TextIOWrapper(sink, encoding="utf-8", newline="", write_through=True)
+    for start in range(0, max(len(df), 1), chunk_size):
+        df.iloc[start : start + chunk_size].to_csv(
+            text, header=start == 0, index=False, lineterminator="\n"
+        )
+    text.flush()
+    text.detach()
+
+
+def render_export(df, fmt, chunk_size=DEFAULT_CHUNK_SIZE):
+    df = export_frame(df)
+    buffer = io.BytesIO()
+    if fmt == "Parquet":
+        df.to_parquet(buffer, index=False)
+    elif fmt == "CSV (gzip)":
+        with gzip.GzipFile(fileobj=buffer, mode="wb") as sink:
+            write_csv(df, sink, chunk_size)
+    else:
+        write_csv(df, buffer, chunk_size)
+    # Hand over the buffer itself; getvalue() here would copy the whole file.
+    buffer.seek(0)
+    return buffer
+
+
+class ExportCache:
+    """Rendered export buffers keyed by view state and format."""
+
+    def __init__(self, max_entries=4):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, df, fmt):
+        key = (key, fmt)
+        with self.lock:
+            data = self.entries.get(key)
+            if data is not None:
+                self.entries.move_to_end(key)
+                return data
+        data = render_export(df, fmt)
+        with self.lock:
+            self.entries[key] = data
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return data
+
+
+def export_button(label, df, file_stem, fmt, exports, state):
+    extension, mime = FORMATS[fmt]
+    options = dict(
+        label=label,
+        file_name=f"{file_stem}.{extension}",
+        mime=mime,
+        key=f"download_{file_stem}",
+    )
+    try:
+        # Rendered on click, on Streamlit's download thread.
+        return st.download_button(data=lambda: exports.get(state, df, fmt), **options)
+    except StreamlitAPIException:
+        # Streamlit releases without deferred downloads need the bytes now.
+        return st.download_button(data=exports.get(state, df, fmt), **options)
@@ -1,28 +1,140 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
 import pandas as pd
+from instrumentation import record_cache
+from ledger import Ledger
+from scheduler import raise_if_cancelled
+
+NGRAM = 3
 
 
 def filter_transactions(df, date_range, selected_category, search_text):
-    filtered_df = df.copy()
-    filtered_df = filtered_df[
-        (filtered_df["Date"] >= pd.to_datetime(date_range[0]))
-        & (filtered_df["Date"] <= pd.to_datetime(date_range[1]))
-    ]
+    mask = (df["Date"] >= pd.to_datetime(date_range[0])) & (
+        df["Date"] <= pd.to_datetime(date_range[1])
+    )
     if selected_category != "All":
-        filtered_df = filtered_df[filtered_df["Category"] == selected_category]
+        mask &= df["Category"] == selected_category
     if search_text:
-        filtered_df = filtered_df[
-            filtered_df["Details"].str.contains(search_text, case=False, na=False)
-        ]
-    return filtered_df
-
-
-def add_balance_columns(filtered_df):
-    filtered_df = filtered_df.sort_values("Date")
-    filtered_df["SignedAmount"] = filtered_df.apply(
-        lambda row: (
-            row["Amount"] if row["Debit/Credit"] == "Credit" else -row["Amount"]
-        ),
-        axis=1,
-    )
-    filtered_df["Balance"] = filtered_df["SignedAmount"].cumsum()
-    return filtered_df
+        mask &= df["Details"].str.contains(
+            search_text, case=False, na=False, regex=False
+        )
+    return df[mask]
+
+
+def add_balance_columns(filtered_df, ledger=None):
+    if ledger is None:
+        ledger = Ledger(filtered_df)
+    return ledger.frame(filtered_df, ledger.positions(filtered_df.index))
+
+
+def _ngrams(text):
+    return {text[i : i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+def _postings(codes, count):
+    # Sorted ledger positions for every code, from one stable argsort.
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(count + 1))
+    return [order[bounds[i] : bounds[i + 1]] for i in range(count)]
+
+
+def _clip(positions, lo, hi):
+    return positions[np.searchsorted(positions, lo) : np.searchsorted(positions, hi)]
+
+
+class FilterIndex:
+    """Date, category and Details-search indexes over a ledger's positions.
+
+    Queries return sorted ledger positions instead of copied frames and are
+    memoized, so every view in a rerun shares one result.
+    """
+
+    def __init__(self, df, ledger, max_queries=32):
+        self.ledger = ledger
+        rows = df.index.get_indexer(ledger.labels)
+        categories = df["Category"].astype("category")
+        self.categories = list(categories.cat.categories)
+        self.category_postings = _postings(
+            categories.cat.codes.to_numpy()[rows], len(self.categories)
+        )
+        detail_codes, details = pd.factorize(df["Details"])
+        self.details = [str(detail).lower() for detail in details]
+        self.detail_postings = _postings(detail_codes[rows], len(self.details))
+        self.ngrams = {}
+        for detail_id, detail in enumerate(self.details):
+            for gram in _ngrams(detail):
+                self.ngrams.setdefault(gram, []).append(detail_id)
+        self.max_queries = max_queries
+        self.queries = OrderedDict()
+        # Queries may run on background workers as well as the script thread.
+        self.lock = threading.Lock()
+
+    def _matching_details(self, text):
+        if len(text) < NGRAM:
+            candidates = range(len(self.details))
+        else:
+            grams = sorted(_ngrams(text), key=lambda g: len(self.ngrams.get(g, ())))
+            candidates = set(self.ngrams.get(grams[0], ()))
+            for gram in grams[1:]:
+                if not candidates:
+                    break
+                candidates &= set(self.ngrams.get(gram, ()))
+        return [i for i in candidates if text in self.details[i]]
+
+    def search(self, text):
+        matches = self._matching_details(text.lower())
+        if not matches:
+            return np.zeros(0, dtype="int64")
+        return np.sort(np.concatenate([self.detail_postings[i] for i in matches]))
+
+    def category(self, name):
+        if name not in self.categories:
+            return np.zeros(0, dtype="int64")
+        return self.category_postings[self.categories.index(name)]
+
+    def query(self, date_range, selected_category="All", search_text=""):
+        window = self.ledger.window(date_range)
+        lo = window[0] if len(window) else 0
+        hi = window[-1] + 1 if len(window) else 0
+        key = (lo, hi, selected_category, search_text.lower())
+        with self.lock:
+            positions = self.queries.get(key)
+            if positions is not None:
+                self.queries.move_to_end(key)
+        record_cache("filter_query", positions is not None)
+        if positions is not None:
+            return positions
+        positions = window
+        if selected_category != "All":
+            positions = _clip(self.category(selected_category), lo, hi)
+        if search_text:
+            matches = _clip(self.search(search_text), lo, hi)
+            positions = (
+                matches
+                if selected_category == "All"
+                else np.intersect1d(positions, matches, assume_unique=True)
+            )
+        with self.lock:
+            self.queries[key] = positions
+            if len(self.queries) > self.max_queries:
+                self.queries.popitem(last=False)
+        return positions
+
+
+def filtered_view(
+    df,
+    ledger,
+    filter_index,
+    date_range,
+    selected_category,
+    search_text,
+    period,
+    cancelled=None,
+):
+    positions = filter_index.query(date_range, selected_category, search_text)
+    raise_if_cancelled(cancelled)
+    filtered_df = ledger.frame(df, positions)
+    raise_if_cancelled(cancelled)
+    return filtered_df, ledger.trend(positions, period)
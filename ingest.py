@@ -0,0 +1,161 @@
+import os
+import shutil
+import tempfile
+
+import pandas as pd
+import streamlit as st
+from cache import content_key
+from categorizer import compile_categories
+from schema import apply_schema
+from utils import (
+    EDITABLE_COLUMNS,
+    apply_edits,
+    clean_transactions,
+    report_malformed_rows,
+)
+
+try:
+    import pyarrow.parquet  # noqa: F401
+except ImportError:
+    pyarrow = None
+
+DEFAULT_CHUNK_SIZE = 100_000
+# Below Streamlit's default 200 MB upload limit; .streamlit/config.toml raises
+# that limit so larger statements can be uploaded at all.
+STREAMING_THRESHOLD_BYTES = 100 * 1024 * 1024
+
+
+def streaming_available():
+    return pyarrow is not None
+
+
+def upload_key(file):
+    # Uploads carry a per-upload id, so a rerun need not re-hash a large file.
+    file_id = getattr(file, "file_id", None)
+    if file_id is not None:
+        return (file_id, getattr(file, "size", None))
+    return content_key(file.getvalue())
+
+
+class StreamedStatement:
+    """A statement stored as Parquet parts, read back one date window at a time.
+
+    Only one chunk is held in memory while ingesting; the window last read is
+    kept so reruns reuse the same frame. Parts hold parsed rows keyed by their
+    row in the file, and categories and edits are applied to each window as it
+    is read, so a rule change never re-parses the file.
+    """
+
+    label = "Large statement"
+
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        self.matcher = None
+        self.rules_key = None
+        self.edits = pd.DataFrame(columns=EDITABLE_COLUMNS)
+        self.parts = []
+        self.row_count = 0
+        self.min_date = None
+        self.max_date = None
+        self.malformed_rows = []
+        self._window = None
+
+    def add_chunk(self, chunk):
+        self.malformed_rows.extend(chunk.attrs.get("malformed_rows", []))
+        if chunk.empty:
+            return
+        path = os.path.join(self.store_dir, f"part-{len(self.parts):05d}.parquet")
+        chunk.to_parquet(path, index=True)
+        self.parts.append(path)
+        self.row_count += len(chunk)
+        chunk_min, chunk_max = chunk["Date"].min(), chunk["Date"].max()
+        self.min_date = (
+            chunk_min if self.min_date is None else min(self.min_date, chunk_min)
+        )
+        self.max_date = (
+            chunk_max if self.max_date is None else max(self.max_date, chunk_max)
+        )
+
+    def default_window(self, months=12):
+        start = max(self.min_date, self.max_date - pd.DateOffset(months=months))
+        return start.date(), self.max_date.date()
+
+    def recategorize(self, matcher):
+        rules_key = f"{matcher.fingerprint}:{matcher.match}"
+        if rules_key == self.rules_key:
+            return False
+        self.matcher = matcher
+        self.rules_key = rules_key
+        self._window = None
+        return True
+
+    def read(self, date_range):
+        # Same frame for the same window, so identity-keyed caches keep hitting.
+        key = tuple(pd.Timestamp(value).isoformat() for value in date_range)
+        if self._window is None or self._window[0] != key:
+            df = self.load(date_range)
+            df.attrs["version"] = (self.store_dir, key, self.rules_key)
+            self._window = (key, df)
+        return self._window[1]
+
+    def update_rows(self, changed):
+        rows = changed[EDITABLE_COLUMNS].astype({"Category": object})
+        kept = self.edits[~self.edits.index.isin(rows.index)]
+        self.edits = rows if kept.empty else pd.concat([kept, rows])
+
+    def load(self, date_range=None):
+        filters = None
+        if date_range is not None:
+            filters = [
+                ("Date", ">=", pd.Timestamp(date_range[0])),
+                ("Date", "<=", pd.Timestamp(date_range[1])),
+            ]
+        frames = [pd.read_parquet(path, filters=filters) for path in self.parts]
+        if not frames:
+            return pd.DataFrame()
+        # Parts carry their own categorical dictionaries; re-unify after concat.
+        df = apply_schema(pd.concat(frames))
+        df["Category"] = self.matcher.categorize(df["Details"])
+        # Edits win over the rules, as they do for uploaded statements.
+        return apply_edits(df, self.edits[self.edits.index.isin(df.index)])
+
+
+def stream_transactions(file, store_dir=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    try:
+        if store_dir is None:
+            store_dir = tempfile.mkdtemp(prefix="statement-")
+        os.makedirs(store_dir, exist_ok=True)
+        if hasattr(file, "seek"):
+            file.seek(0)
+        statement = StreamedStatement(store_dir)
+        for chunk in pd.read_csv(file, chunksize=chunk_size, thousands=","):
+            statement.add_chunk(clean_transactions(chunk))
+        return statement
+    except Exception as e:
+        st.error(f"Error processing file: {str(e)}")
+        return None
+
+
+def load_streamed_statement(file, categories, match="exact"):
+    # Keyed on the upload only: new rules re-categorize the window on read.
+    key = upload_key(file)
+    cached = st.session_state.get("streamed_statement")
+    if cached is not None and cached[0] == key:
+        statement = cached[1]
+    else:
+        statement = stream_transactions(file)
+        if statement is None:
+            return None
+        if cached is not None:
+            shutil.rmtree(cached[1].store_dir, ignore_errors=True)
+        st.session_state.streamed_statement = (key, statement)
+    report_malformed_rows(statement.malformed_rows)
+    statement.recategorize(compile_categories(categories, match))
+    return statement
+
+
+def selected_window(statement, key="date_range"):
+    date_range = st.session_state.get(key)
+    if date_range is None or len(date_range) != 2:
+        return statement.default_window()
+    return date_range
@@ -0,0 +1,246 @@
+import cProfile
+import io
+import json
+import logging
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import wraps
+
+import pandas as pd
+import streamlit as st
+
+HISTORY_SIZE = 50
+PROFILE_LINES = 30
+ALLOCATION_LINES = 15
+
+logger = logging.getLogger("simplefinance.metrics")
+_local = threading.local()
+
+
+def frame_memory(df):
+    return int(df.memory_usage(deep=True).sum())
+
+
+class RerunMetrics:
+    """Stage timings, row counts, cache hits and frame sizes for one rerun."""
+
+    def __init__(self, rerun, profile=False):
+        self.rerun = rerun
+        self.started = datetime.now(timezone.utc)
+        self.start = time.perf_counter()
+        self.seconds = None
+        self.stages = {}
+        self.caches = {}
+        self.frames = {}
+        self.profile = None
+        self.profiler = None
+        if profile:
+            tracemalloc.start()
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def add_stage(self, name, seconds, rows=None):
+        entry = self.stages.setdefault(name, {"calls": 0, "seconds": 0.0, "rows": None})
+        entry["calls"] += 1
+        entry["seconds"] += seconds
+        if rows is not None:
+            entry["rows"] = rows
+
+    def add_cache(self, name, hit):
+        entry = self.caches.setdefault(name, {"hits": 0, "misses": 0})
+        entry["hits" if hit else "misses"] += 1
+
+    def add_frame(self, name, df):
+        if df is not None:
+            self.frames[name] = {"rows": len(df), "bytes": frame_memory(df)}
+
+    def finish(self):
+        self.seconds = time.perf_counter() - self.start
+        if self.profiler is None:
+            return
+        self.profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        stats = io.StringIO()
+        pstats.Stats(self.profiler, stream=stats).sort_stats("cumulative").print_stats(
+            PROFILE_LINES
+        )
+        self.profile = {
+            "peak_bytes": peak,
+            "allocations": [
+                str(stat) for stat in snapshot.statistics("lineno")[:ALLOCATION_LINES]
+            ],
+            "cprofile": stats.getvalue(),
+        }
+        self.profiler = None
+
+    def record(self):
+        return {
+            "rerun": self.rerun,
+            "started": self.started.isoformat(),
+            "seconds": self.seconds,
+            "stages": self.stages,
+            "caches": self.caches,
+            "frames": self.frames,
+            "profile": self.profile,
+        }
+
+
+def current():
+    return getattr(_local, "metrics", None)
+
+
+@contextmanager
+def stage(name, rows=None):
+    metrics = current()
+    if metrics is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add_stage(name, time.perf_counter() - start, rows)
+
+
+def timed(name):
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            metrics = current()
+            if metrics is None:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            result = fn(*args, **kwargs)
+            rows = len(result) if isinstance(result, pd.DataFrame) else None
+            metrics.add_stage(name, time.perf_counter() - start, rows)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def record_stage(name, seconds, rows=None):
+    metrics = current()
+    if metrics is not None and seconds is not None:
+        metrics.add_stage(name, seconds, rows)
+
+
+def record_cache(name, hit):
+    metrics = current()
+    if metrics is not None:
+        metrics.add_cache(name, hit)
+
+
+def track_frame(name, df):
+    metrics = current()
+    if metrics is not None:
+        metrics.add_frame(name, df)
+
+
+def start_rerun(state):
+    state["rerun_count"] = state.get("rerun_count", 0) + 1
+    metrics = RerunMetrics(
+        state["rerun_count"], profile=state.pop("profile_next_rerun", False)
+    )
+    _local.metrics = metrics
+    return metrics
+
+
+def finish_rerun(state, metrics):
+    _local.metrics = None
+    metrics.finish()
+    record = metrics.record()
+    if "rerun_metrics" not in state:
+        state["rerun_metrics"] = deque(maxlen=HISTORY_SIZE)
+    state["rerun_metrics"].append(record)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps(record, default=str))
+    return record
+
+
+def _request_profile(state):
+    state["profile_next_rerun"] = True
+
+
+def metrics_log(history):
+    return "".join(json.dumps(record, default=str) + "\n" for record in history)
+
+
+def metrics_panel(state):
+    if not st.sidebar.toggle("Show performance panel", key="show_metrics"):
+        return
+    history = state.get("rerun_metrics")
+    with st.sidebar.expander("⏱️ Performance", expanded=True):
+        st.button(
+            "Profile next rerun",
+            on_click=_request_profile,
+            args=(state,),
+            help="Capture cProfile and tracemalloc output for one rerun.",
+        )
+        if not history:
+            st.write("No reruns recorded yet.")
+            return
+        last = history[-1]
+        st.caption(f"Rerun {last['rerun']}: {last['seconds'] * 1000:,.1f} ms")
+        stages = pd.DataFrame(
+            [
+                {
+                    "Stage": name,
+                    "Calls": entry["calls"],
+                    "ms": entry["seconds"] * 1000,
+                    "Rows": entry["rows"],
+                }
+                for name, entry in last["stages"].items()
+            ]
+        )
+        st.dataframe(stages, hide_index=True, use_container_width=True)
+        if last["caches"]:
+            st.dataframe(
+                pd.DataFrame(
+                    [
+                        {
+                            "Cache": name,
+                            "Hits": entry["hits"],
+                            "Misses": entry["misses"],
+                        }
+                        for name, entry in last["caches"].items()
+                    ]
+                ),
+                hide_index=True,
+                use_container_width=True,
+            )
+        if last["frames"]:
+            st.dataframe(
+                pd.DataFrame(
+                    [
+                        {
+                            "Frame": name,
+                            "Rows": entry["rows"],
+                            "MB": entry["bytes"] / 2**20,
+                        }
+                        for name, entry in last["frames"].items()
+                    ]
+                ),
+                hide_index=True,
+                use_container_width=True,
+            )
+        if last["profile"]:
+            profile = last["profile"]
+            st.caption(f"Peak traced memory: {profile['peak_bytes'] / 2**20:,.1f} MB")
+            st.code("\n".join(profile["allocations"]), language=None)
+            st.code(profile["cprofile"], language=None)
+        st.download_button(
+            "Download metrics log",
+            data=metrics_log(history),
+            file_name="rerun_metrics.jsonl",
+            mime="application/x-ndjson",
+            key="download_metrics",
+        )
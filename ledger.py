@@ -0,0 +1,153 @@
+import numpy as np
+import pandas as pd
+from schema import from_minor_units, signed_minor
+
+PERIODS = ("M", "Y")
+
+
+def _prefix(values):
+    prefix = np.zeros(len(values) + 1, dtype="int64")
+    np.cumsum(values, out=prefix[1:])
+    return prefix
+
+
+def _is_contiguous(positions):
+    return len(positions) > 0 and positions[-1] - positions[0] + 1 == len(positions)
+
+
+def _period_keys(dates):
+    months = dates.astype("datetime64[M]").astype("int64")
+    return {"M": months, "Y": months // 12}
+
+
+def _period_labels(keys, period):
+    if period == "M":
+        return [f"{1970 + key // 12:04d}-{key % 12 + 1:02d}" for key in keys]
+    return [str(1970 + key) for key in keys]
+
+
+class Ledger:
+    """Date-sorted signed amounts with prefix sums for balances and trends.
+
+    Built once per dataset; a date window is a binary search into the sorted
+    dates and its balance and period totals are differences of prefix sums.
+    """
+
+    def __init__(self, df):
+        order = np.argsort(df["Date"].to_numpy(), kind="stable")
+        self.labels = df.index[order]
+        self.dates = df["Date"].to_numpy()[order]
+        self.signed = signed_minor(df).to_numpy(dtype="int64")[order]
+        self.keys = _period_keys(self.dates)
+        self.debit = np.where(self.signed < 0, -self.signed, 0)
+        self.credit = np.where(self.signed > 0, self.signed, 0)
+        self.balance_prefix = _prefix(self.signed)
+        self.debit_prefix = _prefix(self.debit)
+        self.credit_prefix = _prefix(self.credit)
+
+    def __len__(self):
+        return len(self.dates)
+
+    def window(self, date_range):
+        lo = np.searchsorted(self.dates, np.datetime64(pd.to_datetime(date_range[0])))
+        hi = np.searchsorted(
+            self.dates, np.datetime64(pd.to_datetime(date_range[1])), side="right"
+        )
+        return np.arange(lo, hi)
+
+    def positions(self, labels):
+        positions = self.labels.get_indexer(labels)
+        return np.sort(positions[positions >= 0])
+
+    def balances(self, positions):
+        if _is_contiguous(positions):
+            lo, hi = positions[0], positions[-1] + 1
+            return self.balance_prefix[lo + 1 : hi + 1] - self.balance_prefix[lo]
+        return np.cumsum(self.signed[positions])
+
+    def frame(self, df, positions):
+        frame = df.loc[self.labels[positions]]
+        frame["SignedAmount"] = from_minor_units(self.signed[positions])
+        frame["Balance"] = from_minor_units(self.balances(positions))
+        return frame
+
+    def trend(self, positions, period="M"):
+        if period not in PERIODS:
+            raise ValueError(f"Unknown period: {period}")
+        keys = self.keys[period][positions]
+        if len(keys) == 0:
+            debit = credit = np.zeros(0, dtype="int64")
+            starts = np.zeros(0, dtype="int64")
+        else:
+            starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+            if _is_contiguous(positions):
+                bounds = np.r_[starts + positions[0], positions[-1] + 1]
+                debit = np.diff(self.debit_prefix[bounds])
+                credit = np.diff(self.credit_prefix[bounds])
+            else:
+                debit = np.add.reduceat(self.debit[positions], starts)
+                credit = np.add.reduceat(self.credit[positions], starts)
+        return pd.DataFrame(
+            {
+                "Debit": from_minor_units(debit),
+                "Credit": from_minor_units(credit),
+                "Net": from_minor_units(credit - debit),
+            },
+            index=pd.Index(_period_labels(keys[starts], period), name="Period"),
+        )
+
+    def append(self, new_df):
+        if new_df.empty:
+            return self
+        order = np.argsort(new_df["Date"].to_numpy(), kind="stable")
+        dates = new_df["Date"].to_numpy()[order]
+        signed = signed_minor(new_df).to_numpy(dtype="int64")[order]
+        # New rows go after existing rows of the same date, as a rebuild over
+        # the combined frame would place them, so the prefix sums before the
+        # first insertion point stay valid.
+        inserts = np.searchsorted(self.dates, dates, side="right")
+        self.labels = pd.Index(
+            np.insert(self.labels.to_numpy(), inserts, new_df.index[order].to_numpy())
+        )
+        self.dates = np.insert(self.dates, inserts, dates)
+        self.signed = np.insert(self.signed, inserts, signed)
+        for period, keys in _period_keys(dates).items():
+            self.keys[period] = np.insert(self.keys[period], inserts, keys)
+        self.debit = np.insert(self.debit, inserts, np.where(signed < 0, -signed, 0))
+        self.credit = np.insert(self.credit, inserts, np.where(signed > 0, signed, 0))
+        start = int(inserts[0])
+        for name, values in [
+            ("balance_prefix", self.signed),
+            ("debit_prefix", self.debit),
+            ("credit_prefix", self.credit),
+        ]:
+            prefix = np.empty(len(values) + 1, dtype="int64")
+            prefix[: start + 1] = getattr(self, name)[: start + 1]
+            prefix[start + 1 :] = prefix[start] + np.cumsum(values[start:])
+            setattr(self, name, prefix)
+        return self
+
+    def update(self, edited_df):
+        positions = self.labels.get_indexer(edited_df.index)
+        known = positions >= 0
+        positions = positions[known]
+        if len(positions) == 0:
+            return self
+        new_signed = signed_minor(edited_df).to_numpy(dtype="int64")[known]
+        changed = self.signed[positions] != new_signed
+        if not changed.any():
+            return self
+        # Edits keep their dates, so only the edited rows and the prefix sums
+        # after the earliest of them change.
+        positions, values = positions[changed], new_signed[changed]
+        self.signed[positions] = values
+        self.debit[positions] = np.where(values < 0, -values, 0)
+        self.credit[positions] = np.where(values > 0, values, 0)
+        start = int(positions.min())
+        for prefix, values in [
+            (self.balance_prefix, self.signed),
+            (self.debit_prefix, self.debit),
+            (self.credit_prefix, self.credit),
+        ]:
+            prefix[start + 1 :] = prefix[start] + np.cumsum(values[start:])
+        return self
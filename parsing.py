@@ -0,0 +1,76 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+from schema import to_minor_units
+
+MONTHS = {
+    name: number
+    for number, name in enumerate(
+        "jan feb mar apr may jun jul aug sep oct nov dec".split(), start=1
+    )
+}
+DATE_CACHE_SIZE = 100_000
+FIRST_DATA_LINE = 2
+_NAT = np.datetime64("NaT", "ns")
+_date_cache = {}
+
+
+def parse_amounts(values):
+    # read_csv(thousands=",") already parses clean columns to floats in C;
+    # strings only reach here when some value in the column is malformed.
+    if not pd.api.types.is_numeric_dtype(values.dtype):
+        text = values.astype(object).where(values.notna(), None)
+        values = pd.to_numeric(
+            text.str.replace(",", "", regex=False).str.strip(), errors="coerce"
+        )
+    values = values.astype("float64")
+    bad = ~np.isfinite(values.to_numpy())
+    return to_minor_units(values.where(~bad, 0)), bad
+
+
+def _parse_date(text):
+    parts = text.split()
+    if len(parts) != 3:
+        return _NAT
+    day, month, year = parts
+    month = MONTHS.get(month.lower())
+    if month is None or not (day.isdigit() and year.isdigit() and len(year) == 4):
+        return _NAT
+    try:
+        return np.datetime64(datetime.date(int(year), month, int(day)), "ns")
+    except ValueError:
+        return _NAT
+
+
+def parse_dates(values):
+    if pd.api.types.is_datetime64_any_dtype(values.dtype):
+        return values.to_numpy(), values.isna().to_numpy()
+    codes, uniques = pd.factorize(values)
+    if len(_date_cache) > DATE_CACHE_SIZE:
+        _date_cache.clear()
+    parsed = np.empty(len(uniques) + 1, dtype="datetime64[ns]")
+    parsed[-1] = _NAT
+    for i, text in enumerate(uniques):
+        date = _date_cache.get(text)
+        if date is None:
+            date = _date_cache[text] = _parse_date(str(text))
+        parsed[i] = date
+    # Missing values factorize to -1, which picks the trailing NaT.
+    dates = parsed[codes]
+    return dates, np.isnat(dates)
+
+
+def malformed_rows(df, masks):
+    issues = []
+    for column, mask in masks.items():
+        for label in df.index[mask]:
+            value = df.at[label, column]
+            issues.append(
+                {
+                    "line": int(label) + FIRST_DATA_LINE,
+                    "column": column,
+                    "value": "" if pd.isna(value) else str(value),
+                }
+            )
+    return sorted(issues, key=lambda issue: issue["line"])
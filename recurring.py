@@ -0,0 +1,195 @@
+import re
+
+import numpy as np
+import pandas as pd
+from categorizer import normalize_text
+from schema import from_minor_units
+
+# Interval band in days, minimum occurrences and the step to the next charge.
+FREQUENCIES = {
+    "Weekly": (6, 8, 3, pd.DateOffset(weeks=1)),
+    "Monthly": (27, 33, 3, pd.DateOffset(months=1)),
+    "Annual": (355, 375, 2, pd.DateOffset(years=1)),
+}
+MIN_REGULAR_SHARE = 0.75
+MAX_AMOUNT_CV = 0.3
+EVENT_COLUMNS = [
+    "Debit/Credit",
+    "Merchant",
+    "Day",
+    "AmountMinor",
+    "Details",
+    "Category",
+]
+TABLE_COLUMNS = [
+    "Debit/Credit",
+    "Merchant",
+    "Details",
+    "Category",
+    "Count",
+    "First",
+    "Last",
+    "Interval",
+    "Amount",
+    "AmountCV",
+    "Frequency",
+    "Next",
+]
+_NOISE = re.compile(r"[^a-z& ]+")
+
+
+def normalize_merchant(details):
+    # Drop digits and punctuation so "NETFLIX.COM 8841" and "Netflix.com" match.
+    words = _NOISE.sub(" ", normalize_text(details)).split()
+    return " ".join(words) or normalize_text(details)
+
+
+def _categorical(values):
+    return values.astype("category").array
+
+
+def _events(df):
+    # Everything stays categorical; merchants are normalized once per distinct
+    # Details value rather than once per row.
+    details = _categorical(df["Details"])
+    names = [normalize_merchant(text) for text in details.categories]
+    merchant_codes, merchants = pd.factorize(pd.Series(names, dtype=object))
+    codes = details.codes
+    return pd.DataFrame(
+        {
+            "Debit/Credit": _categorical(df["Debit/Credit"]),
+            "Merchant": pd.Categorical.from_codes(
+                np.where(codes >= 0, merchant_codes[codes], -1), categories=merchants
+            ),
+            "Day": df["Date"].to_numpy().astype("datetime64[D]").astype("int64"),
+            "AmountMinor": df["AmountMinor"].to_numpy(dtype="int64"),
+            "Details": details,
+            "Category": _categorical(df["Category"]),
+        }
+    )
+
+
+def _concat_events(frames):
+    events = pd.concat(frames, ignore_index=True)
+    for column in ["Debit/Credit", "Merchant", "Details", "Category"]:
+        if not isinstance(events[column].dtype, pd.CategoricalDtype):
+            events[column] = events[column].astype("category")
+    return events
+
+
+def _group_medians(values, groups, starts, counts):
+    # Median per group after one lexsort by (group, value).
+    order = np.lexsort((values, groups))
+    ordered = values[order]
+    low = ordered[starts + (counts - 1) // 2]
+    high = ordered[starts + counts // 2]
+    return (low + high) / 2
+
+
+def series_table(events):
+    if events.empty:
+        return pd.DataFrame(columns=TABLE_COLUMNS)
+    # One integer key per (side, merchant) so the sort never compares strings.
+    side_codes = events["Debit/Credit"].cat.codes.to_numpy().astype("int64")
+    merchant_codes = events["Merchant"].cat.codes.to_numpy().astype("int64")
+    series = merchant_codes * (side_codes.max() + 1) + side_codes
+    order = np.lexsort((events["Day"].to_numpy(), series))
+    events = events.iloc[order]
+    series = series[order]
+    day = events["Day"].to_numpy()
+    minor = events["AmountMinor"].to_numpy().astype("float64")
+
+    first = np.ones(len(events), dtype=bool)
+    first[1:] = series[1:] != series[:-1]
+    group = np.cumsum(first) - 1
+    starts = np.flatnonzero(first)
+    ends = np.r_[starts[1:], len(events)] - 1
+    count = np.bincount(group)
+
+    mean = np.bincount(group, weights=minor) / count
+    square = np.bincount(group, weights=minor * minor) / count
+    std = np.sqrt(np.maximum(square - mean * mean, 0.0))
+    cv = np.divide(std, np.abs(mean), out=np.zeros_like(std), where=mean != 0)
+
+    # Inter-arrival gaps; the first row of every series has none.
+    gap = np.diff(day, prepend=day[0])[~first]
+    gap_group = group[~first]
+    gap_count = count - 1
+    repeated = gap_count > 0
+    gap_starts = np.r_[0, np.cumsum(gap_count)[:-1]]
+    interval = np.full(len(count), np.nan)
+    interval[repeated] = _group_medians(
+        gap, gap_group, gap_starts[repeated], gap_count[repeated]
+    )
+
+    frequency = np.full(len(count), "", dtype=object)
+    for name, (low, high, min_count, _) in FREQUENCIES.items():
+        in_band = np.bincount(
+            gap_group, weights=(gap >= low) & (gap <= high), minlength=len(count)
+        )
+        share = np.divide(in_band, gap_count, out=np.zeros(len(count)), where=repeated)
+        matches = (
+            (interval >= low)
+            & (interval <= high)
+            & (count >= min_count)
+            & (share >= MIN_REGULAR_SHARE)
+            & (cv <= MAX_AMOUNT_CV)
+        )
+        frequency[matches & (frequency == "")] = name
+
+    last = pd.to_datetime(day[ends], unit="D")
+    upcoming = pd.Series(pd.NaT, index=range(len(count)), dtype="datetime64[ns]")
+    for name, (_, _, _, step) in FREQUENCIES.items():
+        matches = frequency == name
+        if matches.any():
+            upcoming[matches] = last[matches] + step
+    return pd.DataFrame(
+        {
+            "Debit/Credit": events["Debit/Credit"].to_numpy()[starts].astype(object),
+            "Merchant": events["Merchant"].to_numpy()[starts].astype(object),
+            "Details": events["Details"].to_numpy()[ends].astype(object),
+            "Category": events["Category"].to_numpy()[ends].astype(object),
+            "Count": count,
+            "First": pd.to_datetime(day[starts], unit="D"),
+            "Last": last,
+            "Interval": interval,
+            "Amount": from_minor_units(mean),
+            "AmountCV": cv,
+            "Frequency": frequency,
+            "Next": upcoming.to_numpy(),
+        }
+    )
+
+
+class RecurringIndex:
+    """Per-merchant recurring series, refreshed only for merchants that change.
+
+    ``events`` keeps the few columns the detector needs for every transaction
+    seen so far; ``table`` holds one row per (side, merchant) series.
+    """
+
+    def __init__(self, df=None):
+        self.events = pd.DataFrame(columns=EVENT_COLUMNS)
+        self.table = pd.DataFrame(columns=TABLE_COLUMNS)
+        if df is not None:
+            self.update(df)
+
+    def update(self, df):
+        if df is None or df.empty:
+            return self.table
+        new = _events(df)
+        self.events = new if self.events.empty else _concat_events([self.events, new])
+        affected = new["Merchant"].unique()
+        touched = self.events[self.events["Merchant"].isin(affected)]
+        kept = self.table[~self.table["Merchant"].isin(affected)]
+        refreshed = series_table(touched)
+        self.table = (
+            refreshed if kept.empty else pd.concat([kept, refreshed], ignore_index=True)
+        )
+        return self.table
+
+    def subscriptions(self, side):
+        table = self.table[
+            (self.table["Debit/Credit"] == side) & (self.table["Frequency"] != "")
+        ]
+        return table.sort_values("Next", ignore_index=True)
@@ -0,0 +1,147 @@
+import json
+import os
+import stat
+import tempfile
+import threading
+from contextlib import contextmanager
+
+from categorizer import rules_fingerprint
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+CATEGORY_FILE = "categories.json"
+DEFAULT_FILE_MODE = 0o644
+DEFAULT_CATEGORIES = {
+    "Uncategorized": [],
+    "Food": [],
+    "Transport": [],
+    "Shopping": [],
+    "Utilities": [],
+    "Health": [],
+    "Entertainment": [],
+    "Education": [],
+    "Other": [],
+}
+
+
+def copy_rules(categories):
+    return {name: list(keywords) for name, keywords in categories.items()}
+
+
+@contextmanager
+def file_lock(path):
+    # Advisory lock on a sidecar file; readers never need it because the
+    # rules file itself is only ever replaced atomically.
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class RuleStore:
+    """Process-wide copy of categories.json, re-read only when the file changes.
+
+    ``version`` is the fingerprint of the rules, so sessions compare it to
+    notice edits made elsewhere. Writes re-read the file under a lock, apply
+    one batch of changes and replace the file atomically.
+    """
+
+    def __init__(self, path=CATEGORY_FILE):
+        self.path = path
+        self.lock_path = f"{path}.lock"
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._rules = None
+        self.version = None
+
+    def _file_stamp(self):
+        try:
+            info = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        # Every atomic replace gets a new inode, even within one mtime tick.
+        return info.st_ino, info.st_mtime_ns, info.st_size
+
+    def _refresh(self):
+        stamp = self._file_stamp()
+        if self._rules is not None and stamp == self._stamp:
+            return
+        if stamp is None:
+            rules = copy_rules(DEFAULT_CATEGORIES)
+        else:
+            with open(self.path, "r") as f:
+                rules = json.load(f)
+        self._stamp = stamp
+        self._rules = rules
+        self.version = rules_fingerprint(rules)
+
+    def current_version(self):
+        with self._lock:
+            self._refresh()
+            return self.version
+
+    def snapshot(self):
+        with self._lock:
+            self._refresh()
+            return self.version, copy_rules(self._rules)
+
+    def _file_mode(self):
+        try:
+            return stat.S_IMODE(os.stat(self.path).st_mode)
+        except FileNotFoundError:
+            return DEFAULT_FILE_MODE
+
+    def _write(self, rules):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(rules, f)
+                f.flush()
+                os.fsync(f.fileno())
+            # mkstemp creates the file 0600; the replacement keeps the old mode.
+            os.chmod(tmp_path, self._file_mode())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        self._stamp = self._file_stamp()
+        self._rules = rules
+        self.version = rules_fingerprint(rules)
+
+    @contextmanager
+    def batch(self):
+        # Edits apply to the latest rules on disk, so concurrent sessions
+        # merge instead of overwriting each other; the file is written once.
+        with self._lock, file_lock(self.lock_path):
+            self._refresh()
+            rules = copy_rules(self._rules)
+            yield rules
+            if rules_fingerprint(rules) != self.version:
+                self._write(rules)
+
+    def replace(self, categories):
+        with self.batch() as rules:
+            rules.clear()
+            rules.update(copy_rules(categories))
+        return self.version
+
+
+rule_store = RuleStore()
@@ -0,0 +1,133 @@
+import threading
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import streamlit as st
+from instrumentation import record_stage
+
+MAX_WORKERS = 4
+DEBOUNCE_SECONDS = 0.3
+WAIT_SECONDS = 0.5
+POLL_SECONDS = 0.1
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _shared_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=MAX_WORKERS, thread_name_prefix="dashboard-worker"
+            )
+        return _executor
+
+
+def data_version(df, state, key="edit_version"):
+    # Sources tag their frames with what they were built from, so the same
+    # data read again keeps its job key; in-place edits bump the counter.
+    return df.attrs.get("version", id(df)), state.get(key, 0)
+
+
+def raise_if_cancelled(cancelled):
+    if cancelled is not None and cancelled.is_set():
+        raise CancelledError()
+
+
+class Job:
+    """One keyed computation; superseded jobs are cancelled cooperatively."""
+
+    def __init__(self, key, fn, delay=0.0):
+        self.key = key
+        self.fn = fn
+        self.delay = delay
+        self.cancelled = threading.Event()
+        self.submitted = time.monotonic()
+        self.seconds = None
+        self.future = None
+
+    def run(self):
+        # Debounce: a newer input arriving during the delay cancels this job
+        # before it does any work.
+        if self.delay and self.cancelled.wait(self.delay):
+            raise CancelledError()
+        start = time.perf_counter()
+        result = self.fn(self.cancelled)
+        self.seconds = time.perf_counter() - start
+        return result
+
+    def cancel(self):
+        self.cancelled.set()
+        self.future.cancel()
+
+
+class Scheduler:
+    """Per-session background computations on a shared thread pool.
+
+    Each named slot runs at most one current job. While it is pending, the
+    last completed result for the slot is served and marked stale.
+    """
+
+    def __init__(
+        self, debounce=DEBOUNCE_SECONDS, wait=WAIT_SECONDS, executor_factory=None
+    ):
+        self.debounce = debounce
+        self.wait = wait
+        self.executor_factory = executor_factory or _shared_executor
+        self.jobs = {}
+        self.completed = {}
+
+    def submit(self, name, key, fn):
+        job = self.jobs.get(name)
+        if job is not None and job.key == key:
+            return job
+        delay = 0.0
+        if job is not None:
+            # Inputs changing in quick succession wait out the debounce window.
+            if time.monotonic() - job.submitted < self.debounce:
+                delay = self.debounce
+            job.cancel()
+        job = Job(key, fn, delay)
+        job.future = self.executor_factory().submit(job.run)
+        self.jobs[name] = job
+        return job
+
+    def result(self, name, key, fn):
+        job = self.submit(name, key, fn)
+        last = self.completed.get(name)
+        if last is not None and last[0] == key:
+            return key, last[1], False
+        try:
+            value = job.future.result(timeout=self.wait if last is not None else None)
+        except FutureTimeoutError:
+            return last[0], last[1], True
+        self.completed[name] = (key, value)
+        record_stage(name, job.seconds)
+        return key, value, False
+
+    def rerun_when_ready(self, name, key, message="Updating..."):
+        # Element updates let Streamlit stop this run as soon as the user
+        # changes an input, so waiting here never blocks the UI.
+        job = self.jobs.get(name)
+        if job is None or job.key != key:
+            return
+        status = st.empty()
+        while not job.future.done():
+            status.caption(message)
+            time.sleep(POLL_SECONDS)
+        status.empty()
+        # Only a finished job for the current inputs has something new to show.
+        if job.future.cancelled() or job.future.exception() is not None:
+            return
+        if self.jobs.get(name) is job:
+            st.rerun()
+
+
+def session_scheduler(store, key="scheduler"):
+    scheduler = store.get(key)
+    if scheduler is None:
+        scheduler = Scheduler()
+        store[key] = scheduler
+    return scheduler
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+MINOR_UNITS = 100
+CATEGORICAL_COLUMNS = ["Details", "Currency", "Debit/Credit", "Status"]
+INTERNAL_COLUMNS = ["AmountMinor", "Sign"]
+
+
+def to_minor_units(amount):
+    amount = np.asarray(amount, dtype="float64")
+    return np.round(amount * MINOR_UNITS).astype("int64")
+
+
+def from_minor_units(minor):
+    return minor / MINOR_UNITS
+
+
+def sign_column(debit_credit):
+    sign = np.where(debit_credit == "Credit", 1, 0)
+    sign = np.where(debit_credit == "Debit", -1, sign)
+    return sign.astype("int8")
+
+
+def apply_schema(df):
+    for column in CATEGORICAL_COLUMNS:
+        if column in df and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype("category")
+    if "AmountMinor" not in df:
+        df["AmountMinor"] = to_minor_units(df["Amount"])
+    # Amount is kept as a float view of the exact minor units for display/editing.
+    df["Amount"] = from_minor_units(df["AmountMinor"])
+    df["Sign"] = sign_column(df["Debit/Credit"])
+    return df
+
+
+def signed_minor(df):
+    return df["AmountMinor"] * df["Sign"]
+
+
+def export_frame(df):
+    return df.drop(columns=INTERNAL_COLUMNS, errors="ignore")
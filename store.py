@@ -0,0 +1,275 @@
+import sqlite3
+from contextlib import closing
+
+import pandas as pd
+import streamlit as st
+from cache import content_key
+from categorizer import compile_categories
+from ledger import Ledger
+from recurring import RecurringIndex
+from schema import apply_schema, from_minor_units
+from utils import load_transactions, read_file_bytes
+
+store_file = "transactions.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    details TEXT NOT NULL,
+    amount_minor INTEGER NOT NULL,
+    currency TEXT,
+    debit_credit TEXT NOT NULL,
+    status TEXT,
+    category TEXT NOT NULL,
+    occurrence INTEGER NOT NULL,
+    original_amount_minor INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions (date);
+CREATE INDEX IF NOT EXISTS idx_transactions_details ON transactions (details);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+# The fingerprint uses the imported amount, which edits never change, so a
+# re-imported statement still matches its edited rows.
+FINGERPRINT_INDEX = """
+CREATE UNIQUE INDEX IF NOT EXISTS idx_transactions_fingerprint ON transactions
+    (date, details, original_amount_minor, debit_credit, occurrence);
+"""
+
+COLUMNS = {
+    "date": "Date",
+    "details": "Details",
+    "amount_minor": "AmountMinor",
+    "currency": "Currency",
+    "debit_credit": "Debit/Credit",
+    "status": "Status",
+    "category": "Category",
+}
+
+
+def _fingerprint_columns(df):
+    # Identical rows in one statement are real repeats, so each copy is
+    # numbered; re-importing the same statement yields the same numbers.
+    # Rows with empty Details are numbered too (dropna=False).
+    keys = ["Date", "Details", "AmountMinor", "Debit/Credit"]
+    return df.groupby(keys, observed=True, sort=False, dropna=False).cumcount()
+
+
+def _date_bounds(date_range):
+    return (
+        pd.Timestamp(date_range[0]).strftime("%Y-%m-%d"),
+        pd.Timestamp(date_range[1]).strftime("%Y-%m-%d"),
+    )
+
+
+class TransactionStore:
+    """SQLite file of imported transactions, deduplicated on a row fingerprint.
+
+    Exposes the same windowed-source interface as ``StreamedStatement``
+    (``min_date``, ``max_date``, ``row_count``, ``default_window``, ``read``,
+    ``recategorize``, ``update_rows``).
+    """
+
+    label = "Transaction history"
+
+    def __init__(self, path=store_file):
+        self.path = path
+        self.category_names = None
+        self._window = None
+        self._ledger = None
+        self._generation = 0
+        self._recurring = None
+        self._recurring_id = 0
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+            columns = {
+                row[1] for row in conn.execute("PRAGMA table_info(transactions)")
+            }
+            if "original_amount_minor" not in columns:
+                # Stores created before the column existed keep their rows.
+                conn.executescript(
+                    "ALTER TABLE transactions ADD COLUMN original_amount_minor "
+                    "INTEGER NOT NULL DEFAULT 0;"
+                    "UPDATE transactions SET original_amount_minor = amount_minor;"
+                )
+            conn.executescript(FINGERPRINT_INDEX)
+
+    def _connect(self):
+        return sqlite3.connect(self.path)
+
+    def import_frame(self, df):
+        rows = pd.DataFrame(
+            {
+                "date": df["Date"].dt.strftime("%Y-%m-%d"),
+                "details": df["Details"].astype(object).fillna("").astype(str),
+                "amount_minor": df["AmountMinor"].astype("int64"),
+                "currency": df["Currency"].astype(str),
+                "debit_credit": df["Debit/Credit"].astype(str),
+                "status": df["Status"].astype(str),
+                "category": df["Category"].astype(str),
+                "occurrence": _fingerprint_columns(df),
+            }
+        )
+        rows["original_amount_minor"] = rows["amount_minor"]
+        with closing(self._connect()) as conn, conn:
+            last_id = conn.execute("SELECT MAX(id) FROM transactions").fetchone()[0]
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO transactions (date, details, amount_minor, "
+                "currency, debit_credit, status, category, occurrence, "
+                "original_amount_minor) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows.itertuples(index=False, name=None),
+            )
+            added = conn.total_changes - before
+        if added:
+            self._generation += 1
+            if self._window is not None:
+                self._extend_window(last_id or 0)
+        return added
+
+    def _extend_window(self, after_id):
+        # Only the imported rows inside the cached window are read back; they
+        # are inserted into its ledger instead of rebuilding it.
+        key, df = self._window
+        new = self.load(key, after_id=after_id)
+        window = apply_schema(pd.concat([df, new]))
+        window.attrs["version"] = (self.path, key, self._generation)
+        if self._ledger is not None and self._ledger[0] is df:
+            self._ledger = (window, self._ledger[1].append(new))
+        self._window = (key, window)
+
+    @property
+    def row_count(self):
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+
+    def date_bounds(self):
+        with closing(self._connect()) as conn:
+            low, high = conn.execute(
+                "SELECT MIN(date), MAX(date) FROM transactions"
+            ).fetchone()
+        if low is None:
+            return None
+        return pd.Timestamp(low), pd.Timestamp(high)
+
+    @property
+    def min_date(self):
+        return self.date_bounds()[0]
+
+    @property
+    def max_date(self):
+        return self.date_bounds()[1]
+
+    def default_window(self, months=12):
+        min_date, max_date = self.date_bounds()
+        start = max(min_date, max_date - pd.DateOffset(months=months))
+        return start.date(), max_date.date()
+
+    def read(self, date_range):
+        key = _date_bounds(date_range)
+        if self._window is None or self._window[0] != key:
+            df = self.load(date_range)
+            df.attrs["version"] = (self.path, key, self._generation)
+            self._window = (key, df)
+        return self._window[1]
+
+    def ledger(self, df):
+        # Kept with the window frame it was built for; imports patch it.
+        if self._ledger is None or self._ledger[0] is not df:
+            self._ledger = (df, Ledger(df))
+        return self._ledger[1]
+
+    def load(self, date_range=None, after_id=None):
+        clauses, params = [], []
+        if after_id is not None:
+            clauses.append("id > ?")
+            params.append(after_id)
+        if date_range is not None:
+            clauses.append("date BETWEEN ? AND ?")
+            params.extend(_date_bounds(date_range))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        query = f"SELECT id, {', '.join(COLUMNS)} FROM transactions {where}"
+        with closing(self._connect()) as conn:
+            df = pd.read_sql_query(query, conn, params=params, index_col="id")
+        df = df.rename(columns=COLUMNS)
+        df.index.name = None
+        df["Date"] = pd.to_datetime(df["Date"], format="%Y-%m-%d")
+        df["Amount"] = from_minor_units(df["AmountMinor"])
+        df = apply_schema(df)
+        if self.category_names is not None:
+            df["Category"] = df["Category"].astype(
+                pd.CategoricalDtype(self.category_names)
+            )
+        return df
+
+    def recurring(self):
+        # Built once from the full history, then fed only rows imported since.
+        with closing(self._connect()) as conn:
+            last_id = conn.execute("SELECT MAX(id) FROM transactions").fetchone()[0]
+        if self._recurring is None:
+            self._recurring = RecurringIndex()
+            self._recurring_id = 0
+        if last_id is not None and last_id > self._recurring_id:
+            self._recurring.update(self.load(after_id=self._recurring_id))
+            self._recurring_id = last_id
+        return self._recurring
+
+    def update_rows(self, changed):
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "UPDATE transactions SET amount_minor = ?, category = ? WHERE id = ?",
+                zip(
+                    (int(value) for value in changed["AmountMinor"]),
+                    changed["Category"].astype(str),
+                    (int(value) for value in changed.index),
+                ),
+            )
+        self._recurring = None
+
+    def recategorize(self, matcher):
+        self.category_names = matcher.category_names
+        # The match mode changes results as much as the keywords do.
+        rules_key = f"{matcher.fingerprint}:{matcher.match}"
+        with closing(self._connect()) as conn, conn:
+            current = conn.execute(
+                "SELECT value FROM meta WHERE key = 'rules'"
+            ).fetchone()
+            if current is not None and current[0] == rules_key:
+                return False
+            details = [
+                row[0]
+                for row in conn.execute("SELECT DISTINCT details FROM transactions")
+            ]
+            categories = matcher.categorize(pd.Series(details, dtype=object))
+            conn.executemany(
+                "UPDATE transactions SET category = ? WHERE details = ?",
+                zip(categories.astype(str), details),
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('rules', ?)",
+                (rules_key,),
+            )
+        self._window = None
+        self._generation += 1
+        self._recurring = None
+        return True
+
+
+def open_store(files, categories, match="exact"):
+    store = st.session_state.get("transaction_store")
+    if store is None:
+        store = TransactionStore()
+        st.session_state.transaction_store = store
+    imported = st.session_state.setdefault("imported_statements", {})
+    for file in files or []:
+        key = content_key(read_file_bytes(file))
+        if key not in imported:
+            df = load_transactions(file, categories, match)
+            if df is None:
+                return None
+            imported[key] = store.import_frame(df)
+            st.toast(f"Imported {imported[key]:,} new transactions.")
+    store.recategorize(compile_categories(categories, match))
+    if store.date_bounds() is None:
+        return None
+    return store
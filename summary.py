@@ -0,0 +1,43 @@
+import pandas as pd
+from schema import from_minor_units
+
+SIDES = ("Debit", "Credit")
+KEYS = ["Debit/Credit", "Category"]
+
+
+class Summary:
+    """Per-side totals and category sums.
+
+    Everything is rolled up from one groupby over (side, category),
+    so both the Expenses and Payments tabs read from a single pass.
+    """
+
+    def __init__(self, df):
+        groups = (
+            pd.DataFrame({**{key: df[key] for key in KEYS}, "minor": df["AmountMinor"]})
+            .groupby(KEYS, observed=True)
+            .agg(minor=("minor", "sum"))
+        )
+        self.rows = len(df)
+        self.sides = groups.groupby(level="Debit/Credit", observed=True).sum()
+        self.categories = groups["minor"]
+
+    def _side(self, side, column):
+        if side not in self.sides.index:
+            return 0
+        return self.sides.at[side, column]
+
+    def total(self, side):
+        return from_minor_units(int(self._side(side, "minor")))
+
+    @property
+    def net_savings(self):
+        return self.total("Credit") - self.total("Debit")
+
+    def category_totals(self, side):
+        if side not in self.categories.index.get_level_values(0):
+            return pd.DataFrame({"Category": [], "Amount": []})
+        totals = from_minor_units(self.categories.xs(side, level="Debit/Credit"))
+        return (
+            totals.rename("Amount").reset_index().sort_values("Amount", ascending=False)
+        )
@@ -0,0 +1,95 @@
+import math
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from instrumentation import timed
+
+DEFAULT_PAGE_SIZE = 50
+NO_SORT = "(original order)"
+
+
+def _sort_key(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Rank categories alphabetically; missing values sort last.
+        ranks = np.argsort(np.argsort(series.cat.categories.astype(str)))
+        codes = series.cat.codes.to_numpy()
+        return np.where(codes >= 0, ranks[codes], len(ranks))
+    return series.to_numpy()
+
+
+class SortOrders:
+    """Per-column argsorts of a dataset, reused to order any subset of it."""
+
+    def __init__(self, df):
+        self.df = df
+        self.orders = {}
+
+    def order(self, column):
+        if column not in self.orders:
+            self.orders[column] = np.argsort(_sort_key(self.df[column]), kind="stable")
+        return self.orders[column]
+
+    def sorted_labels(self, subset, column, ascending=True):
+        rows = self.df.index.get_indexer(subset.index)
+        member = np.zeros(len(self.df), dtype=bool)
+        member[rows[rows >= 0]] = True
+        order = self.order(column)
+        ordered = order[member[order]]
+        if not ascending:
+            ordered = ordered[::-1]
+        return self.df.index[ordered]
+
+
+def lazy_section(label, key, value=False):
+    return st.toggle(label, value=value, key=key)
+
+
+@timed("tables")
+def paginated_table(
+    data,
+    columns,
+    key,
+    sort_orders=None,
+    column_config=None,
+    page_size=DEFAULT_PAGE_SIZE,
+    editable=False,
+):
+    total_rows = len(data)
+    page, sort_column, ascending = 1, NO_SORT, True
+    if total_rows > page_size:
+        pages = math.ceil(total_rows / page_size)
+        sort_col, order_col, page_col = st.columns([2, 1, 1])
+        if sort_orders is not None:
+            sort_column = sort_col.selectbox(
+                "Sort by", [NO_SORT] + columns, key=f"{key}_sort"
+            )
+            ascending = order_col.toggle("Ascending", value=True, key=f"{key}_asc")
+        page = page_col.number_input(
+            f"Page (of {pages:,})", min_value=1, value=1, step=1, key=f"{key}_page"
+        )
+        page = min(int(page), pages)
+    start = (page - 1) * page_size
+    stop = min(start + page_size, total_rows)
+    if sort_column != NO_SORT:
+        labels = sort_orders.sorted_labels(data, sort_column, ascending)
+        page_df = data.loc[labels[start:stop], columns]
+    else:
+        page_df = data.iloc[start:stop][columns]
+    if total_rows > page_size:
+        st.caption(f"Rows {start + 1:,}-{stop:,} of {total_rows:,}")
+    if editable:
+        return st.data_editor(
+            page_df,
+            column_config=column_config,
+            hide_index=True,
+            use_container_width=True,
+            key=f"{key}_{page}_{sort_column}_{ascending}",
+        )
+    st.dataframe(
+        page_df,
+        column_config=column_config,
+        use_container_width=True,
+        hide_index=True,
+    )
+    return page_df
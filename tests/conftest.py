@@ -0,0 +1,23 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.generate import generate_categories, generate_statement  # noqa: E402
+from categorizer import compile_categories  # noqa: E402
+from utils import parse_transactions  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def categories():
+    return generate_categories(40)
+
+
+@pytest.fixture
+def statement(categories):
+    csv = generate_statement(2_000, categories, seed=1).to_csv(index=False)
+    df = parse_transactions(csv.encode("utf-8"))
+    df["Category"] = compile_categories(categories).categorize(df["Details"])
+    return df
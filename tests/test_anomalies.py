@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+from anomalies import AnomalyScores
+from schema import apply_schema
+
+
+def _frame(amounts, category="Food", side="Debit"):
+    df = pd.DataFrame(
+        {
+            "Date": pd.date_range("2024-01-01", periods=len(amounts), freq="D"),
+            "Details": "Shop",
+            "AmountMinor": amounts,
+            "Debit/Credit": side,
+            "Category": category,
+        }
+    )
+    df["Amount"] = df["AmountMinor"] / 100
+    return apply_schema(df)
+
+
+def test_flags_the_outlier_only():
+    amounts = [2000 + (i % 5) * 100 for i in range(30)]
+    amounts[17] = 50_000
+    df = _frame(amounts)
+    scores = AnomalyScores(df)
+    assert list(scores.flagged("Debit", 3.5)) == [df.index[17]]
+    assert scores.scores.loc[df.index[17], "Typical"] == 22.0
+
+
+def test_categories_have_separate_baselines():
+    rent = _frame([200_000] * 12, category="Rent")
+    food = _frame([2000 + i * 10 for i in range(12)])
+    df = pd.concat([rent, food], ignore_index=True)
+    assert len(AnomalyScores(df).flagged("Debit", 3.5)) == 0
+
+
+def test_flagged_is_a_ranked_prefix():
+    rng = np.random.default_rng(3)
+    df = _frame(rng.integers(1000, 5000, 200))
+    scores = AnomalyScores(df)
+    for threshold in [0.0, 1.0, 2.5]:
+        flagged = scores.flagged("Debit", threshold)
+        expected = scores.scores.index[scores.scores["Score"] >= threshold]
+        assert sorted(flagged) == sorted(expected)
+        assert scores.scores.loc[flagged, "Score"].is_monotonic_decreasing
+    assert len(scores.flagged("Credit", 0.0)) == 0
@@ -0,0 +1,33 @@
+from benchmarks.run import compare
+
+
+def _results(rows, **stages):
+    return [
+        {
+            "rows": rows,
+            "keywords": 10,
+            "stages": {
+                name: {"seconds": median, "median_seconds": median}
+                for name, median in stages.items()
+            },
+        }
+    ]
+
+
+def test_gate_needs_relative_and_absolute_slowdown():
+    baseline = {"results": _results(100_000, parse=0.100, trend=0.001)}
+    current = _results(100_000, parse=0.200, trend=0.004)
+    assert compare(current, baseline, 0.25) == [(100_000, 10, "parse", 0.100, 0.200)]
+    assert compare(current, baseline, 0.25, noise_floor=0.2) == []
+
+
+def test_small_cases_are_not_gated():
+    baseline = {"results": _results(1_000, parse=0.010)}
+    assert compare(_results(1_000, parse=0.100), baseline, 0.25) == []
+
+
+def test_old_baselines_fall_back_to_minimum():
+    baseline = {"results": _results(100_000, parse=0.100)}
+    del baseline["results"][0]["stages"]["parse"]["median_seconds"]
+    assert compare(_results(100_000, parse=0.110), baseline, 0.25) == []
+    assert len(compare(_results(100_000, parse=0.150), baseline, 0.25)) == 1
@@ -0,0 +1,58 @@
+import os
+
+import pandas as pd
+import pytest
+from cache import ParseCache, content_key, pyarrow
+
+
+def _frame(n=3):
+    return pd.DataFrame({"Details": [f"row {i}" for i in range(n)], "Amount": 1.5})
+
+
+def test_content_key_depends_on_bytes_only():
+    assert content_key(b"a,b\n1,2\n") == content_key(bytearray(b"a,b\n1,2\n"))
+    assert content_key(b"a,b\n1,2\n") != content_key(b"a,b\n1,3\n")
+
+
+def test_categorized_entry_follows_rules_key():
+    cache = ParseCache()
+    parsed = _frame()
+    cache.put_parsed("k", parsed)
+    assert cache.get_parsed("k") is parsed
+    assert cache.get_categorized("k", "rules-1") is None
+    categorized = parsed.assign(Category="Food")
+    cache.put_categorized("k", "rules-1", categorized)
+    assert cache.get_categorized("k", "rules-1") is categorized
+    assert cache.get_categorized("k", "rules-2") is None
+    assert cache.get_parsed("k") is parsed
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = ParseCache(max_entries=2)
+    for key in "abc":
+        cache.put_parsed(key, _frame())
+        cache.get_parsed("a")
+    assert list(cache.entries) == ["c", "a"]
+    assert cache.get_parsed("b") is None
+
+
+@pytest.mark.skipif(pyarrow is None, reason="needs pyarrow")
+@pytest.mark.parametrize("disk_format", ["parquet", "feather"])
+def test_disk_tier_survives_restart_and_is_capped(tmp_path, disk_format):
+    cache = ParseCache(disk_dir=str(tmp_path), disk_format=disk_format)
+    cache.put_parsed("a", _frame())
+    restarted = ParseCache(disk_dir=str(tmp_path), disk_format=disk_format)
+    pd.testing.assert_frame_equal(restarted.get_parsed("a"), _frame())
+
+    size = os.path.getsize(tmp_path / f"a.{disk_format}")
+    capped = ParseCache(
+        disk_dir=str(tmp_path), disk_format=disk_format, max_disk_bytes=size
+    )
+    os.utime(tmp_path / f"a.{disk_format}", ns=(0, 0))
+    capped.put_parsed("b", _frame())
+    assert sorted(os.listdir(tmp_path)) == [f"b.{disk_format}"]
+
+
+def test_rejects_unknown_disk_format():
+    with pytest.raises(ValueError):
+        ParseCache(disk_format="pickle")
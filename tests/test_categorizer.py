@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+from categorizer import UNCATEGORIZED, CategoryMatcher, KeywordAutomaton
+
+
+def brute_force_matches(keywords, text):
+    return sorted(
+        (start, start + len(keyword), keyword)
+        for keyword in keywords
+        for start in range(len(text) - len(keyword) + 1)
+        if text.startswith(keyword, start)
+    )
+
+
+@pytest.mark.parametrize(
+    "keywords, text",
+    [
+        (["he", "she", "his", "hers"], "ushers"),
+        (["a", "aa", "aaa"], "aaaa"),
+        (["abc", "bcd", "cde", "c"], "abcdeabc"),
+        (["noon", "noon.com", "on"], "payment noon.com noon"),
+    ],
+)
+def test_automaton_finds_every_occurrence(keywords, text):
+    automaton = KeywordAutomaton(keywords)
+    assert sorted(automaton.iter_matches(text)) == brute_force_matches(keywords, text)
+
+
+def test_automaton_matches_brute_force_on_random_text():
+    rng = np.random.default_rng(0)
+    keywords = list(
+        {"".join(rng.choice(list("abc"), rng.integers(1, 5))) for _ in range(30)}
+    )
+    automaton = KeywordAutomaton(keywords)
+    for _ in range(50):
+        text = "".join(rng.choice(list("abc"), 40))
+        assert sorted(automaton.iter_matches(text)) == brute_force_matches(
+            keywords, text
+        )
+
+
+RULES = {
+    UNCATEGORIZED: [],
+    "Food": ["Careem Food", "NOON"],
+    "Shopping": ["noon.com", "DU"],
+    "Transport": ["careem"],
+}
+
+
+@pytest.mark.parametrize(
+    "match, details, expected",
+    [
+        ("exact", "NOON.COM", "Shopping"),
+        ("exact", "NOON.COM DUBAI", UNCATEGORIZED),
+        ("substring", "PAYMENT NOON.COM DUBAI", "Shopping"),
+        ("substring", "DUBAI MALL", UNCATEGORIZED),
+        ("substring", "CAREEM FOOD ORDER", "Transport"),
+        ("prefix", "CAREEM RIDE 123", "Transport"),
+        ("prefix", "RIDE CAREEM", UNCATEGORIZED),
+    ],
+)
+def test_match_modes(match, details, expected):
+    matcher = CategoryMatcher(RULES, match)
+    assert matcher.categorize(pd.Series([details]))[0] == expected
+
+
+def test_later_category_wins_for_duplicate_keywords():
+    rules = {"Food": ["card payment"], "Other": ["Card Payment"]}
+    matcher = CategoryMatcher(rules)
+    assert matcher.categorize(pd.Series(["CARD PAYMENT"]))[0] == "Other"
+
+
+def test_categorize_handles_missing_details():
+    matcher = CategoryMatcher(RULES, "substring")
+    result = matcher.categorize(pd.Series(["noon", None]))
+    assert list(result) == ["Food", UNCATEGORIZED]
+
+
+def test_unknown_match_mode_is_rejected():
+    with pytest.raises(ValueError):
+        CategoryMatcher(RULES, "fuzzy")
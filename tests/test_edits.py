@@ -0,0 +1,33 @@
+import numpy as np
+from utils import apply_edits, changed_rows
+
+
+def _other_category(df, label):
+    current = df.at[label, "Category"]
+    return next(name for name in df["Category"].cat.categories if name != current)
+
+
+def test_changed_rows_keeps_only_real_changes(statement):
+    edited = statement.head(10).copy()
+    edited.loc[edited.index[2], "Amount"] = 123.45
+    edited.loc[edited.index[5], "Category"] = _other_category(edited, edited.index[5])
+    changed = changed_rows(statement, edited)
+    assert list(changed.index) == [edited.index[2], edited.index[5]]
+
+
+def test_cleared_amount_keeps_stored_value(statement):
+    edited = statement.head(10).copy()
+    edited.loc[edited.index[1], "Amount"] = np.nan
+    edited.loc[edited.index[3], "Amount"] = np.inf
+    edited.loc[edited.index[1], "Category"] = _other_category(edited, edited.index[1])
+    changed = changed_rows(statement, edited)
+    assert list(changed.index) == [edited.index[1]]
+    assert changed["Amount"].iloc[0] == statement["Amount"].iloc[1]
+
+
+def test_apply_edits_refreshes_minor_units(statement):
+    df = statement.copy()
+    edited = df.head(3).copy()
+    edited["Amount"] = [1.5, 2.25, 1000.0]
+    apply_edits(df, changed_rows(df, edited))
+    assert df["AmountMinor"].head(3).tolist() == [150, 225, 100000]
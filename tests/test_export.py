@@ -0,0 +1,41 @@
+import gzip
+import io
+
+import pandas as pd
+import pytest
+from export import ExportCache, available_formats, render_export
+from schema import export_frame
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 50_000])
+def test_chunked_csv_matches_to_csv(statement, chunk_size):
+    data = render_export(statement, "CSV", chunk_size).getvalue()
+    expected = export_frame(statement).to_csv(index=False, lineterminator="\n")
+    assert data.decode("utf-8") == expected
+
+
+def test_gzip_round_trips(statement):
+    data = render_export(statement.head(50), "CSV (gzip)").getvalue()
+    plain = render_export(statement.head(50), "CSV").getvalue()
+    assert gzip.decompress(data) == plain
+
+
+def test_empty_frame_keeps_header(statement):
+    data = render_export(statement.iloc[:0], "CSV").getvalue().decode("utf-8")
+    assert data.strip() == ",".join(export_frame(statement).columns)
+
+
+@pytest.mark.skipif("Parquet" not in available_formats(), reason="needs pyarrow")
+def test_parquet_round_trips(statement):
+    df = pd.read_parquet(render_export(statement, "Parquet"))
+    pd.testing.assert_frame_equal(df, export_frame(statement).reset_index(drop=True))
+
+
+def test_cache_reuses_buffers_and_evicts_oldest(statement):
+    exports = ExportCache(max_entries=2)
+    first = exports.get("a", statement, "CSV")
+    assert exports.get("a", statement, "CSV") is first
+    exports.get("b", statement, "CSV")
+    exports.get("c", statement, "CSV")
+    assert list(exports.entries) == [("b", "CSV"), ("c", "CSV")]
+    assert isinstance(first, io.BytesIO)
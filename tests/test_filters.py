@@ -0,0 +1,27 @@
+import pytest
+from filters import FilterIndex, filter_transactions
+from ledger import Ledger
+
+
+@pytest.mark.parametrize(
+    "date_range",
+    [
+        ("2022-01-01", "2025-12-31"),
+        ("2024-06-01", "2024-06-30"),
+        ("2030-01-01", "2030-02-01"),
+    ],
+)
+@pytest.mark.parametrize("category", ["All", "Food", "Uncategorized", "Missing"])
+@pytest.mark.parametrize("search", ["", "merchant 0", "un", "SHOP 01", "zzz"])
+def test_index_matches_mask_filter(statement, date_range, category, search):
+    ledger = Ledger(statement)
+    index = FilterIndex(statement, ledger)
+    positions = index.query(date_range, category, search)
+    expected = filter_transactions(statement, date_range, category, search)
+    assert sorted(ledger.labels[positions]) == sorted(expected.index)
+
+
+def test_repeated_query_is_memoized(statement):
+    index = FilterIndex(statement, Ledger(statement))
+    first = index.query(("2022-01-01", "2025-12-31"), "Food", "merchant")
+    assert index.query(("2022-01-01", "2025-12-31"), "Food", "MERCHANT") is first
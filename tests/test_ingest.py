@@ -0,0 +1,75 @@
+import io
+
+import pandas as pd
+import pytest
+from benchmarks.generate import generate_statement
+from categorizer import compile_categories
+from ingest import stream_transactions, streaming_available
+from utils import apply_edits, parse_transactions
+
+pytestmark = pytest.mark.skipif(not streaming_available(), reason="needs pyarrow")
+
+WINDOW = ("2023-01-01", "2024-06-30")
+
+
+@pytest.fixture
+def csv(categories):
+    return generate_statement(3_000, categories, seed=2).to_csv(index=False).encode()
+
+
+@pytest.fixture
+def streamed(csv, categories, tmp_path):
+    statement = stream_transactions(io.BytesIO(csv), str(tmp_path), chunk_size=700)
+    statement.recategorize(compile_categories(categories))
+    return statement
+
+
+def _expected(csv, matcher):
+    df = parse_transactions(csv)
+    df["Category"] = matcher.categorize(df["Details"])
+    dates = df["Date"]
+    return df[(dates >= WINDOW[0]) & (dates <= WINDOW[1])]
+
+
+def _columns(df):
+    return df[["Date", "Details", "AmountMinor", "Category"]].astype(
+        {"Details": str, "Category": str}
+    )
+
+
+def test_window_matches_parsed_statement(csv, categories, streamed):
+    window = streamed.read(WINDOW)
+    expected = _expected(csv, compile_categories(categories))
+    assert streamed.row_count == 3_000
+    pd.testing.assert_frame_equal(_columns(window), _columns(expected))
+    assert streamed.read(WINDOW) is window
+
+
+def test_rule_change_recategorizes_without_reparsing(csv, categories, streamed):
+    parts = list(streamed.parts)
+    window = streamed.read(WINDOW)
+    substring = compile_categories(categories, "substring")
+    assert streamed.recategorize(substring)
+    assert not streamed.recategorize(substring)
+    assert streamed.parts == parts
+    recategorized = streamed.read(WINDOW)
+    assert recategorized is not window
+    assert recategorized.attrs["version"] != window.attrs["version"]
+    pd.testing.assert_frame_equal(
+        _columns(recategorized), _columns(_expected(csv, substring))
+    )
+
+
+def test_edits_survive_new_windows_and_rules(categories, streamed):
+    window = streamed.read(WINDOW)
+    changed = window.iloc[[3, 40]][["Amount", "Category"]].copy()
+    changed["Amount"] = [1.25, 999.0]
+    changed["Category"] = window["Category"].cat.categories[0]
+    apply_edits(window, changed)
+    streamed.update_rows(window.loc[changed.index])
+
+    streamed.read(("2020-01-01", "2030-01-01"))
+    streamed.recategorize(compile_categories(categories, "prefix"))
+    reread = streamed.read(WINDOW)
+    assert reread["AmountMinor"].loc[changed.index].tolist() == [125, 99_900]
+    assert (reread["Category"].loc[changed.index] == changed["Category"]).all()
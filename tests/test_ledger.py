@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+from ledger import Ledger
+from utils import apply_edits
+
+
+def naive_view(df, date_range):
+    view = df[
+        (df["Date"] >= pd.Timestamp(date_range[0]))
+        & (df["Date"] <= pd.Timestamp(date_range[1]))
+    ].sort_values("Date", kind="stable")
+    signed = np.where(view["Debit/Credit"] == "Credit", view["Amount"], -view["Amount"])
+    return view.assign(SignedAmount=signed, Balance=np.cumsum(signed))
+
+
+def naive_trend(view, period):
+    keys = view["Date"].dt.to_period(period).astype(str)
+    totals = (
+        view.groupby([keys, "Debit/Credit"], observed=True)["Amount"]
+        .sum()
+        .unstack(fill_value=0.0)
+    )
+    return totals["Debit"], totals["Credit"]
+
+
+DATE_RANGES = [("2022-01-01", "2025-12-31"), ("2023-03-15", "2024-02-10")]
+
+
+@pytest.mark.parametrize("date_range", DATE_RANGES)
+def test_window_balances_match_cumsum(statement, date_range):
+    ledger = Ledger(statement)
+    frame = ledger.frame(statement, ledger.window(date_range))
+    expected = naive_view(statement, date_range)
+    assert list(frame["Date"]) == list(expected["Date"])
+    np.testing.assert_allclose(frame["Balance"], expected["Balance"], atol=1e-6)
+
+
+@pytest.mark.parametrize("date_range", DATE_RANGES)
+@pytest.mark.parametrize("period", ["M", "Y"])
+def test_trend_matches_groupby(statement, date_range, period):
+    ledger = Ledger(statement)
+    trend = ledger.trend(ledger.window(date_range), period)
+    debit, credit = naive_trend(naive_view(statement, date_range), period)
+    assert list(trend.index) == list(debit.index)
+    np.testing.assert_allclose(trend["Debit"], debit, atol=1e-6)
+    np.testing.assert_allclose(trend["Credit"], credit, atol=1e-6)
+    np.testing.assert_allclose(trend["Net"], credit - debit, atol=1e-6)
+
+
+def test_trend_of_scattered_positions(statement):
+    ledger = Ledger(statement)
+    positions = ledger.window(DATE_RANGES[0])[::3]
+    subset = statement.loc[ledger.labels[positions]]
+    debit, credit = naive_trend(naive_view(subset, DATE_RANGES[0]), "M")
+    trend = ledger.trend(positions, "M")
+    np.testing.assert_allclose(trend["Debit"], debit, atol=1e-6)
+    np.testing.assert_allclose(trend["Credit"], credit, atol=1e-6)
+
+
+def test_update_matches_rebuild(statement):
+    ledger = Ledger(statement)
+    changed = statement.iloc[[5, 700, 1500]][["Amount", "Category"]].copy()
+    changed["Amount"] = [1.25, 9_999.99, 0.01]
+    apply_edits(statement, changed)
+    ledger.update(statement.loc[changed.index])
+    rebuilt = Ledger(statement)
+    for name in ["signed", "debit", "credit"]:
+        np.testing.assert_array_equal(getattr(ledger, name), getattr(rebuilt, name))
+    for name in ["balance_prefix", "debit_prefix", "credit_prefix"]:
+        np.testing.assert_array_equal(getattr(ledger, name), getattr(rebuilt, name))
+
+
+@pytest.mark.parametrize("split", [0, 1, 1_000, 1_999])
+def test_append_matches_rebuild(statement, split):
+    shuffled = statement.sample(frac=1, random_state=0)
+    ledger = Ledger(shuffled.iloc[:split]).append(shuffled.iloc[split:])
+    rebuilt = Ledger(shuffled)
+    assert list(ledger.labels) == list(rebuilt.labels)
+    for name in ["dates", "signed", "debit", "credit", "balance_prefix"]:
+        np.testing.assert_array_equal(getattr(ledger, name), getattr(rebuilt, name))
+    for period in ["M", "Y"]:
+        np.testing.assert_array_equal(ledger.keys[period], rebuilt.keys[period])
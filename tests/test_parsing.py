@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+from parsing import parse_amounts, parse_dates
+from utils import parse_transactions
+
+
+def test_parse_amounts_handles_malformed_text():
+    values = pd.Series(["1,234.50", " 7 ", "abc", None, "inf"], dtype=object)
+    minor, bad = parse_amounts(values)
+    assert list(minor) == [123450, 700, 0, 0, 0]
+    assert list(bad) == [False, False, True, True, True]
+
+
+def test_parse_amounts_keeps_numeric_columns():
+    minor, bad = parse_amounts(pd.Series([12.34, 2.5, np.nan]))
+    assert list(minor[:2]) == [1234, 250]
+    assert list(bad) == [False, False, True]
+
+
+def test_parse_dates_matches_pandas():
+    text = ["16 Aug 2022", "01 jan 2024", "29 Feb 2024", "16 Aug 2022"]
+    dates, bad = parse_dates(pd.Series(text))
+    expected = pd.to_datetime(text, format="%d %b %Y").to_numpy()
+    assert (dates == expected).all()
+    assert not bad.any()
+
+
+@pytest.mark.parametrize(
+    "text", ["30 Feb 2024", "16 Foo 2022", "2022-08-16", "16 Aug 22", None]
+)
+def test_parse_dates_flags_invalid(text):
+    dates, bad = parse_dates(pd.Series([text], dtype=object))
+    assert bad.tolist() == [True]
+    assert np.isnat(dates[0])
+
+
+def test_parse_transactions_skips_and_reports_malformed_rows():
+    csv = (
+        "Date,Details,Amount,Currency,Debit/Credit,Status\n"
+        "16 Aug 2022,Shop,43.10,AED,Debit,SETTLED\n"
+        "31 Sep 2022,Shop,1.00,AED,Debit,SETTLED\n"
+        '17 Aug 2022,Salary,"1,000.00",AED,Credit,SETTLED\n'
+        "18 Aug 2022,Shop,n/a,AED,Debit,SETTLED\n"
+    )
+    df = parse_transactions(csv.encode("utf-8"))
+    assert df["AmountMinor"].tolist() == [4310, 100000]
+    assert [(i["line"], i["column"]) for i in df.attrs["malformed_rows"]] == [
+        (3, "Date"),
+        (5, "Amount"),
+    ]
+
+
+def test_parse_transactions_rejects_files_without_valid_rows():
+    csv = "Date,Details,Amount,Currency,Debit/Credit,Status\nx,Shop,1,AED,Debit,OK\n"
+    with pytest.raises(ValueError):
+        parse_transactions(csv.encode("utf-8"))
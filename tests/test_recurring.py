@@ -0,0 +1,61 @@
+import pandas as pd
+from recurring import RecurringIndex, normalize_merchant
+from schema import apply_schema
+
+
+def _frame(rows):
+    df = pd.DataFrame(rows, columns=["Date", "Details", "AmountMinor", "Debit/Credit"])
+    df["Date"] = pd.to_datetime(df["Date"])
+    df["Amount"] = df["AmountMinor"] / 100
+    df["Category"] = "Bills"
+    return apply_schema(df)
+
+
+def _monthly(details, count, amount=1599, start="2024-01-01"):
+    dates = pd.date_range(start, periods=count, freq="MS") + pd.Timedelta(days=14)
+    return [(date, details, amount, "Debit") for date in dates]
+
+
+def test_normalize_merchant_drops_reference_numbers():
+    assert normalize_merchant("NETFLIX.COM 8841") == normalize_merchant("Netflix.com")
+
+
+def test_detects_monthly_subscription():
+    rows = _monthly("NETFLIX.COM 8841", 6) + [
+        ("2024-02-03", "Coffee", 1200, "Debit"),
+        ("2024-04-20", "Coffee", 900, "Debit"),
+    ]
+    table = RecurringIndex(_frame(rows)).subscriptions("Debit")
+    assert len(table) == 1
+    row = table.iloc[0]
+    assert row["Frequency"] == "Monthly"
+    assert row["Count"] == 6
+    assert row["Amount"] == 15.99
+    assert row["Next"] == pd.Timestamp("2024-07-15")
+
+
+def test_irregular_amounts_are_not_a_subscription():
+    rows = [
+        (date, "Grocer", amount, "Debit")
+        for (date, _, _, _), amount in zip(
+            _monthly("Grocer", 6), [500, 9000, 1200, 30000, 800, 15000]
+        )
+    ]
+    assert RecurringIndex(_frame(rows)).subscriptions("Debit").empty
+
+
+def test_update_matches_full_rebuild():
+    rows = _monthly("Gym 1", 4) + _monthly("Phone", 5, amount=9900)
+    later = _monthly("Gym 2", 3, start="2024-05-01") + [
+        ("2024-06-01", "Bakery", 450, "Debit")
+    ]
+    index = RecurringIndex(_frame(rows))
+    index.update(_frame(later))
+    full = RecurringIndex(_frame(rows + later)).table
+    columns = ["Merchant", "Count", "Frequency", "Next"]
+    pd.testing.assert_frame_equal(
+        index.table[columns].sort_values("Merchant", ignore_index=True),
+        full[columns].sort_values("Merchant", ignore_index=True),
+    )
+    gym = index.table[index.table["Merchant"] == "gym"].iloc[0]
+    assert gym["Count"] == 7
@@ -0,0 +1,72 @@
+import json
+import os
+import stat
+from concurrent.futures import ProcessPoolExecutor
+
+from rules import DEFAULT_CATEGORIES, RuleStore
+
+
+def add_keywords(path, worker, count):
+    store = RuleStore(path)
+    for i in range(count):
+        with store.batch() as rules:
+            rules["Food"].append(f"keyword {worker}-{i}")
+
+
+def test_missing_file_serves_defaults(tmp_path):
+    version, rules = RuleStore(str(tmp_path / "categories.json")).snapshot()
+    assert rules == DEFAULT_CATEGORIES
+    assert version is not None
+
+
+def test_concurrent_batches_from_processes_all_land(tmp_path):
+    path = str(tmp_path / "categories.json")
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        list(pool.map(add_keywords, [path] * 4, range(4), [20] * 4))
+    _, rules = RuleStore(path).snapshot()
+    assert sorted(rules["Food"]) == sorted(
+        f"keyword {worker}-{i}" for worker in range(4) for i in range(20)
+    )
+
+
+def test_batches_merge_with_edits_from_another_store(tmp_path):
+    path = str(tmp_path / "categories.json")
+    first, second = RuleStore(path), RuleStore(path)
+    first.snapshot()
+    with second.batch() as rules:
+        rules["Travel"] = ["emirates"]
+    with first.batch() as rules:
+        rules["Food"].append("noon")
+    with open(path) as f:
+        saved = json.load(f)
+    assert saved["Travel"] == ["emirates"]
+    assert saved["Food"] == ["noon"]
+    assert first.current_version() == second.current_version()
+
+
+def test_unchanged_batch_does_not_write(tmp_path):
+    path = str(tmp_path / "categories.json")
+    store = RuleStore(path)
+    with store.batch() as rules:
+        rules["Food"].append("noon")
+    before = os.stat(path).st_mtime_ns, os.stat(path).st_ino
+    with store.batch():
+        pass
+    assert (os.stat(path).st_mtime_ns, os.stat(path).st_ino) == before
+
+
+def test_snapshot_returns_independent_copies(tmp_path):
+    store = RuleStore(str(tmp_path / "categories.json"))
+    _, rules = store.snapshot()
+    rules["Food"].append("noon")
+    assert store.snapshot()[1]["Food"] == []
+
+
+def test_replace_keeps_file_mode(tmp_path):
+    path = str(tmp_path / "categories.json")
+    store = RuleStore(path)
+    store.replace({"Food": []})
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o644
+    os.chmod(path, 0o664)
+    store.replace({"Food": ["noon"]})
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o664
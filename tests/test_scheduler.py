@@ -0,0 +1,62 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+from scheduler import Scheduler, data_version, raise_if_cancelled
+
+
+@pytest.fixture
+def executor():
+    pool = ThreadPoolExecutor(max_workers=2)
+    yield pool
+    pool.shutdown(wait=True, cancel_futures=True)
+
+
+def test_result_waits_for_first_value(executor):
+    scheduler = Scheduler(debounce=0, wait=0, executor_factory=lambda: executor)
+    key, value, stale = scheduler.result("view", 1, lambda cancelled: "one")
+    assert (key, value, stale) == (1, "one", False)
+
+
+def test_serves_last_result_while_new_key_is_pending(executor):
+    scheduler = Scheduler(debounce=0, wait=0.05, executor_factory=lambda: executor)
+    scheduler.result("view", 1, lambda cancelled: "one")
+    release = threading.Event()
+
+    def slow(cancelled):
+        release.wait(5)
+        return "two"
+
+    assert scheduler.result("view", 2, slow) == (1, "one", True)
+    release.set()
+    scheduler.jobs["view"].future.result(timeout=5)
+    assert scheduler.result("view", 2, slow) == (2, "two", False)
+
+
+def test_superseded_job_is_cancelled(executor):
+    scheduler = Scheduler(debounce=0, wait=0, executor_factory=lambda: executor)
+    started = threading.Event()
+
+    def blocking(cancelled):
+        started.set()
+        while True:
+            raise_if_cancelled(cancelled)
+            cancelled.wait(0.01)
+
+    first = scheduler.submit("view", 1, blocking)
+    started.wait(5)
+    second = scheduler.submit("view", 2, lambda cancelled: "two")
+    assert first.cancelled.is_set()
+    assert second.future.result(timeout=5) == "two"
+    assert scheduler.submit("view", 2, lambda cancelled: "again") is second
+
+
+def test_data_version_follows_source_and_edits():
+    df = pd.DataFrame({"a": [1]})
+    df.attrs["version"] = ("store", 3)
+    state = {}
+    before = data_version(df, state)
+    assert data_version(df.copy(), state) == before
+    state["edit_version"] = 1
+    assert data_version(df, state) != before
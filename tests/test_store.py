@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+from categorizer import compile_categories
+from ledger import Ledger
+from store import TransactionStore
+from utils import apply_edits
+
+
+@pytest.fixture
+def store(tmp_path):
+    return TransactionStore(str(tmp_path / "transactions.db"))
+
+
+def test_reimport_adds_nothing(store, statement):
+    assert store.import_frame(statement) == len(statement)
+    assert store.import_frame(statement) == 0
+    assert store.row_count == len(statement)
+
+
+def test_identical_rows_are_kept_as_repeats(store, statement):
+    repeated = pd.concat([statement.iloc[[0]]] * 3, ignore_index=True)
+    assert store.import_frame(repeated) == 3
+    assert store.import_frame(repeated) == 0
+    assert store.import_frame(pd.concat([repeated, statement.iloc[[0]]])) == 1
+
+
+def test_rows_without_details_are_imported(store, statement):
+    blank = statement.iloc[:5].copy()
+    blank["Details"] = None
+    assert store.import_frame(blank) == 5
+    assert store.import_frame(blank) == 0
+
+
+def test_reimport_after_amount_edit_adds_nothing(store, statement):
+    store.import_frame(statement)
+    window = store.load()
+    changed = window.iloc[[0, 10]][["Amount", "Category"]].copy()
+    changed["Amount"] = [12_345.0, 0.5]
+    apply_edits(window, changed)
+    store.update_rows(window.loc[changed.index])
+    assert store.import_frame(statement) == 0
+    reloaded = store.load()
+    assert len(reloaded) == len(statement)
+    assert list(reloaded.loc[changed.index, "Amount"]) == [12_345.0, 0.5]
+
+
+def test_read_reuses_the_window_until_an_import(store, statement):
+    store.import_frame(statement.iloc[:1_000])
+    date_range = store.default_window()
+    window = store.read(date_range)
+    assert store.read(date_range) is window
+    store.import_frame(statement)
+    assert store.read(date_range) is not window
+
+
+def test_recategorize_follows_rules_and_match_mode(store, statement, categories):
+    store.import_frame(statement)
+    assert store.recategorize(compile_categories(categories, "exact"))
+    assert not store.recategorize(compile_categories(categories, "exact"))
+    substring = compile_categories(categories, "substring")
+    assert store.recategorize(substring)
+    expected = substring.categorize(statement["Details"]).astype(str)
+    stored = store.load().sort_index()["Category"].astype(str)
+    assert stored.tolist() == expected.tolist()
+
+
+def test_import_extends_the_window_and_its_ledger(store, statement):
+    store.import_frame(statement.iloc[:1_000])
+    date_range = store.default_window()
+    window = store.read(date_range)
+    ledger = store.ledger(window)
+    store.import_frame(statement)
+    extended = store.read(date_range)
+    assert extended is not window
+    assert store.ledger(extended) is ledger
+    fresh = store.load(date_range)
+    pd.testing.assert_frame_equal(extended.sort_index(), fresh.sort_index())
+    assert list(ledger.labels) == list(Ledger(fresh).labels)
+    np.testing.assert_array_equal(ledger.balance_prefix, Ledger(fresh).balance_prefix)
@@ -1,62 +1,365 @@
-import json
+import io
+import multiprocessing
 import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
 import pandas as pd
 import streamlit as st
+from cache import content_key, parse_cache
+from categorizer import compile_categories
+from instrumentation import record_cache, stage, timed
+from parsing import malformed_rows, parse_amounts, parse_dates
+from rules import rule_store
+from schema import apply_schema, to_minor_units
 
-category_file = "categories.json"
+EDITABLE_COLUMNS = ["Amount", "Category"]
+MAX_REPORTED_ROWS = 10
+_pool = None
+_pool_lock = threading.Lock()
 
 
 def load_categories():
-    if os.path.exists(category_file):
-        with open(category_file, "r") as f:
-            return json.load(f)
-    return {
-        "Uncategorized": [],
-        "Food": [],
-        "Transport": [],
-        "Shopping": [],
-        "Utilities": [],
-        "Health": [],
-        "Entertainment": [],
-        "Education": [],
-        "Other": [],
-    }
+    return rule_store.snapshot()[1]
 
 
 def save_categories(categories):
-    with open(category_file, "w") as f:
-        json.dump(categories, f)
+    return rule_store.replace(categories)
 
 
-def categorize_transactions(df, categories):
-    df["Category"] = "Uncategorized"
-    for category, keywords in categories.items():
-        if category == "Uncategorized" or not keywords:
-            continue
-        lowered_keywords = [keyword.lower().strip() for keyword in keywords]
-        for idx, row in df.iterrows():
-            details = row["Details"].lower().strip()
-            if details in lowered_keywords:
-                df.at[idx, "Category"] = category
+def sync_categories(state):
+    # Sessions only take a fresh copy when the shared rules actually changed.
+    version = rule_store.current_version()
+    if state.get("categories_version") == version and "categories" in state:
+        return False
+    state["categories_version"], state["categories"] = rule_store.snapshot()
+    return True
+
+
+def add_category(categories, category):
+    if category in categories:
+        return False
+    with rule_store.batch() as rules:
+        rules.setdefault(category, [])
+    categories[category] = []
+    return True
+
+
+def categorize_transactions(df, categories, match="exact"):
+    matcher = compile_categories(categories, match)
+    df["Category"] = matcher.categorize(df["Details"])
+    return df
+
+
+def read_file_bytes(file):
+    if hasattr(file, "getvalue"):
+        return file.getvalue()
+    with open(file, "rb") as f:
+        return f.read()
+
+
+def clean_transactions(df):
+    df.columns = [col.strip() for col in df.columns]
+    minor, bad_amount = parse_amounts(df["Amount"])
+    dates, bad_date = parse_dates(df["Date"])
+    issues = malformed_rows(df, {"Amount": bad_amount, "Date": bad_date})
+    df["AmountMinor"] = minor
+    df["Date"] = dates
+    if issues:
+        df = df[~(bad_amount | bad_date)].copy()
+    df = apply_schema(df)
+    df.attrs["malformed_rows"] = issues
+    return df
+
+
+@timed("parse")
+def parse_transactions(data):
+    df = clean_transactions(pd.read_csv(io.BytesIO(data), thousands=","))
+    if df.empty and df.attrs["malformed_rows"]:
+        raise ValueError("no valid transactions found")
     return df
 
 
-def load_transactions(file, categories):
+def report_malformed_rows(issues, source="the file"):
+    if not issues:
+        return
+    lines = sorted({issue["line"] for issue in issues})
+    shown = ", ".join(
+        f"line {issue['line']} ({issue['column']} {issue['value']!r})"
+        for issue in issues[:MAX_REPORTED_ROWS]
+    )
+    more = len(issues) - MAX_REPORTED_ROWS
+    if more > 0:
+        shown += f" and {more:,} more"
+    rows = "row" if len(lines) == 1 else "rows"
+    st.warning(f"Skipped {len(lines):,} malformed {rows} in {source}: {shown}.")
+
+
+def load_transactions(file, categories, match="exact"):
     try:
-        df = pd.read_csv(file)
-        df.columns = [col.strip() for col in df.columns]
-        df["Amount"] = df["Amount"].astype(str).str.replace(",", "").astype(float)
-        df["Date"] = pd.to_datetime(df["Date"], format="%d %b %Y")
-        return categorize_transactions(df, categories)
+        with stage("read"):
+            data = read_file_bytes(file)
+            key = content_key(data)
+        matcher = compile_categories(categories, match)
+        rules_key = f"{matcher.fingerprint}:{match}"
+        df = parse_cache.get_categorized(key, rules_key)
+        record_cache("categorized", df is not None)
+        if df is None:
+            parsed = parse_cache.get_parsed(key)
+            record_cache("parsed", parsed is not None)
+            if parsed is None:
+                parsed = parse_transactions(data)
+                parse_cache.put_parsed(key, parsed)
+            with stage("categorize", rows=len(parsed)):
+                df = parsed.assign(Category=matcher.categorize(parsed["Details"]))
+            parse_cache.put_categorized(key, rules_key, df)
+        report_malformed_rows(df.attrs.get("malformed_rows"))
+        return df
     except Exception as e:
         st.error(f"Error processing file: {str(e)}")
         return None
 
 
+def account_name(file):
+    name = getattr(file, "name", file)
+    return os.path.splitext(os.path.basename(str(name)))[0]
+
+
+def categorized_statement(data, categories, match="exact"):
+    # Runs in a worker process, so it only takes and returns picklable values.
+    parsed = parse_transactions(data)
+    matcher = compile_categories(categories, match)
+    return parsed.assign(Category=matcher.categorize(parsed["Details"]))
+
+
+def available_cpus():
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _parse_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Spawned workers are safe to start from Streamlit's script threads.
+            _pool = ProcessPoolExecutor(
+                max_workers=available_cpus(),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _reset_parse_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def categorize_statements(pending, categories, match="exact"):
+    results = {}
+    if len(pending) > 1 and available_cpus() > 1:
+        try:
+            pool = _parse_pool()
+            futures = {
+                key: pool.submit(categorized_statement, data, categories, match)
+                for key, data in pending.items()
+            }
+            for key, future in futures.items():
+                try:
+                    results[key] = future.result()
+                except BrokenProcessPool:
+                    raise
+                except Exception as e:
+                    results[key] = e
+            return results
+        except BrokenProcessPool:
+            _reset_parse_pool()
+            results.clear()
+    for key, data in pending.items():
+        try:
+            results[key] = categorized_statement(data, categories, match)
+        except Exception as e:
+            results[key] = e
+    return results
+
+
+def load_statements(files, categories, match="exact"):
+    matcher = compile_categories(categories, match)
+    rules_key = f"{matcher.fingerprint}:{match}"
+    accounts = {}
+    with stage("read"):
+        contents = {}
+        for file in files:
+            try:
+                data = read_file_bytes(file)
+            except Exception as e:
+                st.error(f"Error processing file {account_name(file)}: {str(e)}")
+                continue
+            key = content_key(data)
+            if key in accounts:
+                continue
+            name = base = account_name(file)
+            suffix = 2
+            while name in accounts.values():
+                name, suffix = f"{base} ({suffix})", suffix + 1
+            accounts[key] = name
+            contents[key] = data
+    merged_key = (tuple(accounts.items()), rules_key)
+    cached = st.session_state.get("merged_statements")
+    record_cache("merged", cached is not None and cached[0] == merged_key)
+    if cached is not None and cached[0] == merged_key:
+        _report_accounts(cached[1])
+        return cached[1]
+
+    frames = {}
+    pending = {}
+    for key, data in contents.items():
+        df = parse_cache.get_categorized(key, rules_key)
+        record_cache("categorized", df is not None)
+        if df is None:
+            parsed = parse_cache.get_parsed(key)
+            record_cache("parsed", parsed is not None)
+            if parsed is not None:
+                df = parsed.assign(Category=matcher.categorize(parsed["Details"]))
+                parse_cache.put_categorized(key, rules_key, df)
+        if df is None:
+            pending[key] = data
+        else:
+            frames[key] = df
+    with stage("parse_statements", rows=len(pending)):
+        results = categorize_statements(pending, categories, match)
+    for key, result in results.items():
+        if isinstance(result, Exception):
+            st.error(f"Error processing file {accounts[key]}: {str(result)}")
+            continue
+        parse_cache.put_parsed(key, result.drop(columns=["Category"]))
+        parse_cache.put_categorized(key, rules_key, result)
+        frames[key] = result
+    keys = [key for key in accounts if key in frames]
+    if not keys:
+        return None
+
+    with stage("merge"):
+        merged = pd.concat([frames[key] for key in keys], ignore_index=True)
+        merged["Account"] = pd.Categorical.from_codes(
+            np.repeat(np.arange(len(keys)), [len(frames[key]) for key in keys]),
+            categories=[accounts[key] for key in keys],
+        )
+        # Per-file categoricals only survive concat when their categories match.
+        merged = apply_schema(merged)
+    merged.attrs = {
+        "malformed_rows": {
+            accounts[key]: frames[key].attrs.get("malformed_rows", []) for key in keys
+        },
+        "sources": [(key, len(frames[key])) for key in keys],
+        "version": merged_key,
+    }
+    # Re-categorizing starts from the cached frames, so earlier edits are
+    # replayed on top.
+    apply_edits(merged, recorded_edits(merged, st.session_state))
+    st.session_state.merged_statements = (merged_key, merged)
+    _report_accounts(merged)
+    return merged
+
+
+def _report_accounts(merged):
+    for account, issues in merged.attrs.get("malformed_rows", {}).items():
+        report_malformed_rows(issues, f"'{account}'")
+
+
 def add_keyword_to_category(categories, category, keyword):
-    keyword = keyword.strip()
-    if keyword and keyword not in categories[category]:
-        categories[category].append(keyword)
-        save_categories(categories)
-        return True
-    return False
+    return add_keywords_to_categories(categories, [(category, keyword)])
+
+
+def _add_keywords(categories, pairs):
+    known = {}
+    added = False
+    for category, keyword in pairs:
+        keyword = str(keyword).strip()
+        if not keyword or category not in categories:
+            continue
+        if category not in known:
+            known[category] = set(categories[category])
+        if keyword not in known[category]:
+            categories[category].append(keyword)
+            known[category].add(keyword)
+            added = True
+    return added
+
+
+def add_keywords_to_categories(categories, pairs):
+    pairs = list(pairs)
+    with rule_store.batch() as rules:
+        _add_keywords(rules, pairs)
+    return _add_keywords(categories, pairs)
+
+
+def changed_rows(original, edited):
+    current = original.loc[edited.index]
+    cleared = ~np.isfinite(edited["Amount"].to_numpy(dtype="float64"))
+    if cleared.any():
+        # A cleared Amount cell comes back as NaN; keep the stored amount.
+        edited = edited.assign(
+            Amount=edited["Amount"].where(~cleared, current["Amount"])
+        )
+    mask = np.zeros(len(edited), dtype=bool)
+    for column in EDITABLE_COLUMNS:
+        before = current[column].astype(object)
+        after = edited[column].astype(object)
+        same = (before == after) | (before.isna() & after.isna())
+        mask |= ~same.to_numpy()
+    return edited[mask]
+
+
+def _source_offsets(df):
+    sources = df.attrs.get("sources", [])
+    return sources, np.cumsum([0] + [rows for _, rows in sources])
+
+
+def record_edits(df, changed, state, key="edit_overlay"):
+    # Edits are kept per statement and row within it, so they survive
+    # re-merging with a different set of files or category rules.
+    sources, offsets = _source_offsets(df)
+    if not sources or changed.empty:
+        return
+    overlay = state.setdefault(key, {})
+    positions = df.index.get_indexer(changed.index)
+    owners = np.searchsorted(offsets, positions, side="right") - 1
+    for owner in np.unique(owners):
+        source = sources[owner][0]
+        mine = owners == owner
+        rows = changed.loc[mine, EDITABLE_COLUMNS].astype({"Category": object})
+        rows.index = positions[mine] - offsets[owner]
+        previous = overlay.get(source)
+        if previous is not None:
+            rows = pd.concat([previous[~previous.index.isin(rows.index)], rows])
+        overlay[source] = rows
+
+
+def recorded_edits(df, state, key="edit_overlay"):
+    overlay = state.get(key)
+    sources, offsets = _source_offsets(df)
+    if not overlay or not sources:
+        return pd.DataFrame(columns=EDITABLE_COLUMNS)
+    edits = [
+        overlay[source].set_axis(overlay[source].index + offsets[owner])
+        for owner, (source, _) in enumerate(sources)
+        if source in overlay
+    ]
+    if not edits:
+        return pd.DataFrame(columns=EDITABLE_COLUMNS)
+    edits = pd.concat(edits)
+    return edits.set_axis(df.index[edits.index])
+
+
+def apply_edits(df, changed):
+    if changed.empty:
+        return df
+    for column in EDITABLE_COLUMNS:
+        df.loc[changed.index, column] = changed[column].to_numpy()
+    df.loc[changed.index, "AmountMinor"] = to_minor_units(changed["Amount"])
+    return df